@@ -1,14 +1,51 @@
+import os
+
 from flask import Flask
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config['SECRET_KEY'] = 'dev-secret-key'
+    # Path to an SQLite question store; unset keeps the JSON files as storage
+    app.config['QUESTION_DB'] = os.environ.get('QUESTION_DB')
+    # Path to an SQLite practice-session store shared by all workers; unset
+    # keeps practice progress in a per-process in-memory LRU
+    app.config['PRACTICE_SESSION_DB'] = os.environ.get('PRACTICE_SESSION_DB')
+    # Append-only log of graded answers; unset keeps attempt analytics in memory
+    app.config['ATTEMPT_LOG'] = os.environ.get('ATTEMPT_LOG')
+    # Load the bank inside create_app() so that, with gunicorn --preload,
+    # forked workers share one read-only snapshot
+    app.config['PRELOAD_BANK'] = os.environ.get('PRELOAD_BANK', '') not in ('', '0', 'false')
+    # Directory for per-request cProfile dumps; unset disables profiling. When
+    # set, requests carrying an X-Profile header are profiled, plus a random
+    # PROFILE_SAMPLE_RATE share of all requests
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)
 
     
-    from .routes import bp as main_bp
+    from .routes import bp as main_bp, bank
     app.register_blueprint(main_bp)
 
-    return app
+    if app.config['QUESTION_DB']:
+        from .storage import SqliteStorage
+        bank.use(SqliteStorage(app.config['QUESTION_DB']))
+    if app.config['PRELOAD_BANK']:
+        bank.preload()
+
+    from .metrics import TimedStore, init_metrics
+    if app.config['PRACTICE_SESSION_DB']:
+        from .sessions import SqliteSessionStore
+        store = SqliteSessionStore(app.config['PRACTICE_SESSION_DB'])
+    else:
+        from .sessions import MemorySessionStore
+        store = MemorySessionStore()
+    app.extensions['practice_store'] = TimedStore(store)
 
+    from .analytics import AttemptLog, AttemptRecorder
+    log = AttemptLog(app.config['ATTEMPT_LOG']) if app.config['ATTEMPT_LOG'] else None
+    app.extensions['attempts'] = AttemptRecorder(log)
 
+    # Per-endpoint timings, span histograms, /metrics and the opt-in profiler
+    init_metrics(app)
+
+    return app
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .dedup import content_hash
+from .fileio import atomic_write, file_lock
+from .indexes import topic_label
+from .practice import OPTION_KEYS, option_mask
+
+
+# Where an attempt came from
+SOURCES = ('question', 'practice', 'set')
+
+# Grading outcome stored per attempt
+WRONG, CORRECT, UNGRADED = 0, 1, 2
+
+# One attempt on disk: time, question key (first 8 bytes of its content
+# hash), selected option mask, outcome, source, then the topic label as
+# length-prefixed UTF-8 so the log can be replayed without the bank.
+RECORD = struct.Struct('<IQBBBB')
+TOPIC_MAX = 255
+
+Attempt = Tuple[int, int, int, int, int, str]
+
+
+def question_key(q: Mapping[str, Any]) -> int:
+    return int(content_hash(q)[:16], 16)
+
+
+def encode_attempts(attempts: Iterable[Attempt]) -> bytes:
+    out = bytearray()
+    for ts, key, mask, outcome, source, topic in attempts:
+        label = topic.encode('utf-8')[:TOPIC_MAX]
+        out += RECORD.pack(ts, key, mask, outcome, source, len(label))
+        out += label
+    return bytes(out)
+
+
+def decode_attempts(data: bytes) -> Iterator[Attempt]:
+    offset = 0
+    end = len(data)
+    while offset + RECORD.size <= end:
+        ts, key, mask, outcome, source, size = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + size > end:
+            break  # torn final write
+        topic = data[offset:offset + size].decode('utf-8', 'replace')
+        offset += size
+        yield ts, key, mask, outcome, source, topic
+
+
+def complete_length(data: bytes) -> int:
+    # Bytes up to the end of the last whole record; anything after it is a
+    # torn write
+    offset = 0
+    end = len(data)
+    while offset + RECORD.size <= end:
+        size = RECORD.size + data[offset + RECORD.size - 1]
+        if offset + size > end:
+            break
+        offset += size
+    return offset
+
+
+def rescore_attempts(attempts: Iterable[Attempt], key_masks: Mapping[int, int]) -> Iterator[Attempt]:
+    # Re-grade logged attempts against the current answer keys, e.g. after a
+    # key correction. `key_masks` maps question keys to compiled key masks
+    # (grading.key_mask, 0 when ungradable). The question key hashes text and
+    # options but not the answer, so corrected questions keep their key;
+    # attempts on questions no longer in the bank keep their outcome.
+    for ts, key, mask, outcome, source, topic in attempts:
+        key_mask = key_masks.get(key)
+        if key_mask is not None:
+            outcome = UNGRADED if not key_mask else (CORRECT if mask == key_mask else WRONG)
+        yield ts, key, mask, outcome, source, topic
+
+
+class AttemptLog:
+    # Append-only binary file of attempt records, shared by every worker.
+    # Each worker's writer thread appends one write per batch under the file
+    # lock; records other workers appended are picked up from the tail, so
+    # each worker's aggregates cover the whole log.
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = path
+        # End of the last whole record this process has read or written
+        self.end = 0
+
+    def append(self, attempts: List[Attempt]) -> List[Attempt]:
+        # Returns the records other workers appended since we last looked
+        data = encode_attempts(attempts)
+        with file_lock(self.path):
+            with open(self.path, 'a+b') as f:
+                others = list(decode_attempts(self._read_tail(f)))
+                f.write(data)
+                self.end += len(data)
+        return others
+
+    def read_new(self) -> List[Attempt]:
+        # Records appended by other workers since we last looked; one stat()
+        # when there are none
+        try:
+            if os.stat(self.path).st_size == self.end:
+                return []
+        except FileNotFoundError:
+            return []
+        with file_lock(self.path):
+            with open(self.path, 'r+b') as f:
+                return list(decode_attempts(self._read_tail(f)))
+
+    def replay(self) -> Iterator[Attempt]:
+        with file_lock(self.path):
+            try:
+                f = open(self.path, 'r+b')
+            except FileNotFoundError:
+                return iter(())
+            with f:
+                self.end = 0
+                return decode_attempts(self._read_tail(f))
+
+    def rescore(self, key_masks: Mapping[int, int]) -> Tuple[int, int]:
+        # Rewrite the log with rescore_attempts() applied; returns (attempts,
+        # changed). Records keep their size, so other workers' read offsets
+        # stay valid, but their in-memory aggregates predate the rewrite:
+        # restart them afterwards.
+        with file_lock(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return 0, 0
+            whole = complete_length(data)
+            old = list(decode_attempts(data[:whole]))
+            new = list(rescore_attempts(old, key_masks))
+            changed = sum(1 for a, b in zip(old, new) if a != b)
+            if changed:
+                # A torn tail is dropped with the rewrite
+                atomic_write(self.path, encode_attempts(new))
+            self.end = whole
+        return len(new), changed
+
+    def _read_tail(self, f: Any) -> bytes:
+        # Whole records past self.end, which then moves past them. Under the
+        # lock nobody is mid-append, so a partial record at the end is a torn
+        # write (a crash or full disk): cut it off, otherwise the next append
+        # would follow it and every later record would decode misaligned.
+        size = f.seek(0, os.SEEK_END)
+        if size == self.end:
+            return b''
+        if size < self.end:
+            # Replaced or truncated behind our back: rescan from the start
+            self.end = 0
+        f.seek(self.end)
+        data = f.read()
+        whole = complete_length(data)
+        if whole < len(data):
+            f.truncate(self.end + whole)
+            data = data[:whole]
+        self.end += whole
+        return data
+
+
+class AttemptStats:
+    # Running aggregates, updated one batch at a time:
+    #   questions[key] -> [attempts, correct, graded, A, B, C, D, E]
+    #   topics[label]  -> [attempts, correct, graded]
+    def __init__(self) -> None:
+        self.attempts = 0
+        self.questions: Dict[int, List[int]] = {}
+        self.topics: Dict[str, List[int]] = {}
+
+    def add(self, attempts: Iterable[Attempt]) -> None:
+        for _, key, mask, outcome, _, topic in attempts:
+            self.attempts += 1
+            row = self.questions.get(key)
+            if row is None:
+                row = self.questions[key] = [0] * (3 + len(OPTION_KEYS))
+            counts = self.topics.get(topic)
+            if counts is None:
+                counts = self.topics[topic] = [0, 0, 0]
+            row[0] += 1
+            counts[0] += 1
+            if outcome != UNGRADED:
+                row[2] += 1
+                counts[2] += 1
+                if outcome == CORRECT:
+                    row[1] += 1
+                    counts[1] += 1
+            for bit in range(len(OPTION_KEYS)):
+                if mask & (1 << bit):
+                    row[3 + bit] += 1
+
+
+def _accuracy(correct: int, graded: int) -> Optional[float]:
+    return round(correct / graded * 100, 1) if graded else None
+
+
+class AttemptRecorder:
+    # Graded answers go onto an in-process queue; a background thread drains
+    # it in batches (every FLUSH_SIZE attempts or FLUSH_INTERVAL seconds),
+    # appends each batch to the log and folds it into the aggregates. The
+    # request path only builds a tuple and enqueues it.
+    FLUSH_SIZE = 512
+    FLUSH_INTERVAL = 1.0  # seconds
+
+    def __init__(self, log: Optional[AttemptLog] = None):
+        self.log = log
+        self.stats = AttemptStats()
+        # Attempts, plus control items: an Event asks the writer to write what
+        # it holds and set it (flush), None asks it to stop (close)
+        self._queue: 'queue.SimpleQueue[Any]' = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.flushed = 0
+        self.batches = 0
+        self.errors = 0
+        if log is not None:
+            self.stats.add(log.replay())
+        atexit.register(self.close)
+
+    def record(self, q: Mapping[str, Any], selected: Optional[str], is_correct: Optional[bool], source: str) -> None:
+        mask = option_mask(selected)
+        if not mask:
+            return
+        outcome = UNGRADED if is_correct is None else (CORRECT if is_correct else WRONG)
+        self._ensure_writer()
+        self._queue.put((int(time.time()), question_key(q), mask, outcome, SOURCES.index(source), topic_label(q.get('topic'))))
+
+    def _ensure_writer(self) -> None:
+        # Started lazily, and again in a forked worker (threads don't survive fork)
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None:
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='attempt-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._drain(block=True)
+            if batch is None:
+                return
+            if batch:
+                self._write(batch)
+
+    def _drain(self, block: bool) -> Optional[List[Attempt]]:
+        # Collect up to FLUSH_SIZE attempts, waiting at most FLUSH_INTERVAL
+        # after the first; None once close() has been called and we're drained
+        batch: List[Attempt] = []
+        deadline = None
+        while len(batch) < self.FLUSH_SIZE:
+            try:
+                if not block:
+                    item = self._queue.get_nowait()
+                elif deadline is None:
+                    item = self._queue.get()
+                    deadline = time.monotonic() + self.FLUSH_INTERVAL
+                else:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                if batch:
+                    self._write(batch)
+                return None
+            if isinstance(item, threading.Event):
+                # Everything queued before the flush request is in `batch` or
+                # already written
+                if batch:
+                    self._write(batch)
+                item.set()
+                return []
+            batch.append(item)
+        return batch
+
+    def _write(self, batch: List[Attempt]) -> None:
+        others: List[Attempt] = []
+        if self.log is not None:
+            try:
+                others = self.log.append(batch)
+            except OSError:
+                self.errors += 1
+        with self._lock:
+            self.stats.add(others)
+            self.stats.add(batch)
+            self.flushed += len(batch)
+            self.batches += 1
+
+    def refresh(self) -> None:
+        # Fold in attempts other workers have logged since our last read or
+        # write, so every worker serves the same aggregates
+        if self.log is None:
+            return
+        try:
+            others = self.log.read_new()
+        except OSError:
+            self.errors += 1
+            return
+        if others:
+            with self._lock:
+                self.stats.add(others)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        # Return once every attempt recorded before the call is written and
+        # folded in. With a writer running in this process, hand off to it:
+        # it may already hold attempts taken off the queue, which draining
+        # here would miss. Without one, drain on the calling thread.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait(timeout)
+            return
+        while True:
+            batch = self._drain(block=False)
+            if batch is None:
+                return
+            if not batch:
+                if self._queue.empty():
+                    return
+                continue
+            self._write(batch)
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def question_stats(self, keys: Mapping[int, Any], limit: int = 50) -> List[Dict[str, Any]]:
+        # Hardest questions first; `keys` maps question keys to (id, question)
+        self.refresh()
+        with self._lock:
+            rows = [(key, list(row)) for key, row in self.stats.questions.items()]
+        out = []
+        for key, (attempts, correct, graded, *choices) in rows:
+            found = keys.get(key)
+            q_id, q = found if found else (None, {})
+            accuracy = _accuracy(correct, graded)
+            out.append({
+                'id': q_id,
+                'key': f'{key:016x}',
+                'text': q.get('text'),
+                'topic': q.get('topic') or '',
+                'attempts': attempts,
+                'correct': correct,
+                'accuracy': accuracy,
+                'difficulty': round(100 - accuracy, 1) if accuracy is not None else None,
+                'choices': dict(zip(OPTION_KEYS, choices)),
+                'answer': q.get('answer'),
+            })
+        out.sort(key=lambda r: (-(r['difficulty'] or 0), -r['attempts']))
+        return out[:limit]
+
+    def question_counts(self, key: int) -> Optional[List[int]]:
+        # Copy of one question's [attempts, correct, graded, A, B, C, D, E].
+        # Called per row by exports, so it doesn't refresh(); callers do once.
+        with self._lock:
+            row = self.stats.questions.get(key)
+            return list(row) if row is not None else None
+
+    def topic_stats(self) -> List[Dict[str, Any]]:
+        self.refresh()
+        with self._lock:
+            rows = [(topic, list(counts)) for topic, counts in self.stats.topics.items()]
+        return [
+            {'topic': topic, 'attempts': attempts, 'correct': correct, 'accuracy': _accuracy(correct, graded)}
+            for topic, (attempts, correct, graded) in sorted(rows)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            'store': self.log.name if self.log is not None else 'memory',
+            'attempts': self.stats.attempts,
+            'pending': self._queue.qsize(),
+            'flushed': self.flushed,
+            'batches': self.batches,
+            'errors': self.errors,
+        }
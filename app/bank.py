@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import gc
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence
+
+from .grading import AnswerKey
+from .indexes import BankIndex
+from .metrics import span
+from .records import freeze
+from .storage import Signature
+
+
+Question = Mapping[str, Any]
+
+
+class BankSnapshot:
+    __slots__ = ('version', 'signature', 'questions', 'created', 'modified', '_index', '_derived')
+
+    def __init__(self, version: int, signature: Signature, questions: Sequence[Question],
+                 index: Optional[BankIndex] = None, modified: Optional[float] = None):
+        self.version = version
+        self.signature = signature
+        self.questions = questions
+        self.created = time.time()
+        # When the stored bank last changed (Last-Modified); falls back to the
+        # load time for storages that can't tell
+        self.modified = modified if modified is not None else self.created
+        self._index = index
+        # Other per-version structures (answer keys, ...) built on demand
+        self._derived: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    @property
+    def index(self) -> BankIndex:
+        # Built lazily on first lookup; a racing duplicate build is harmless
+        if self._index is None:
+            with span('filter'):
+                self._index = BankIndex(self.questions)
+        return self._index
+
+    def select(self, ids: Sequence[int]) -> 'QuestionView':
+        return QuestionView(self.questions, ids)
+
+    def by_subject(self, subject: str) -> 'QuestionView':
+        return self.select(self.index.subject_ids(subject))
+
+    def by_set(self, subject: str, set_id: int) -> 'QuestionView':
+        return self.select(self.index.set_ids(subject, set_id))
+
+    def derived(self, key: Any, build: Callable[[], Any]) -> Any:
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = build()
+        return value
+
+    def answer_key(self, subject: str, set_id: int) -> AnswerKey:
+        return self.derived(('answer_key', subject, set_id), lambda: AnswerKey(self.by_set(subject, set_id)))
+
+
+class QuestionView(Sequence):
+    # Read-only list-like view of selected snapshot positions. Creating one is
+    # O(1); only the questions a caller actually touches are looked up.
+    __slots__ = ('_questions', '_ids')
+
+    def __init__(self, questions: Sequence[Question], ids: Sequence[int]):
+        self._questions = questions
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return QuestionView(self._questions, self._ids[item])
+        return self._questions[self._ids[item]]
+
+    def __iter__(self):
+        questions = self._questions
+        for i in self._ids:
+            yield questions[i]
+
+    def __repr__(self) -> str:
+        return f'<QuestionView {len(self)} questions>'
+
+
+class QuestionBank:
+    # Process-wide view of the question store. The merged list is loaded once
+    # and kept as an immutable snapshot; each access only checks the store's
+    # signature (file mtime/size, or the SQLite version counter), and the
+    # snapshot is rebuilt when it changes or after a write through the bank.
+
+    def __init__(self, storage: Any):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._snapshot: Optional[BankSnapshot] = None
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        # Snapshots served from a precompiled pack
+        self.packed = 0
+
+    def use(self, storage: Any) -> None:
+        with self._lock:
+            self.storage = storage
+            self._snapshot = None
+
+    def snapshot(self) -> BankSnapshot:
+        signature = self.storage.signature()
+        current = self._snapshot
+        if current is not None and current.signature == signature:
+            self.hits += 1
+            return current
+        with self._lock:
+            current = self._snapshot
+            if current is not None and current.signature == signature:
+                self.hits += 1
+                return current
+            self.misses += 1
+            if current is not None:
+                self.reloads += 1
+            self._snapshot = self._load(signature)
+            return self._snapshot
+
+    def _load(self, signature: Signature) -> BankSnapshot:
+        # A fresh precompiled pack is mapped instead of parsing the JSON;
+        # its questions are decoded on first access and its index is stored
+        last_modified = getattr(self.storage, 'last_modified', None)
+        modified = last_modified(signature) if last_modified is not None else None
+        load_packed = getattr(self.storage, 'load_packed', None)
+        packed = load_packed() if load_packed is not None else None
+        if packed is not None:
+            with span('load'):
+                index = packed.index()
+            self._version += 1
+            self.packed += 1
+            return BankSnapshot(self._version, signature, packed.questions, index, modified)
+
+        # The freeze loop allocates a few objects per question and nothing
+        # cyclic; pausing the collector stops it rescanning the growing heap
+        # every few hundred allocations.
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with span('load'):
+                questions = tuple(freeze(q) for q in self.storage.load() if isinstance(q, dict))
+        finally:
+            if enabled:
+                gc.enable()
+        self._version += 1
+        return BankSnapshot(self._version, signature, questions, modified=modified)
+
+    def preload(self) -> BankSnapshot:
+        # Load and index the bank up front. Called before workers fork
+        # (gunicorn --preload), every worker starts from the parent's
+        # snapshot and shares its pages copy-on-write instead of parsing its
+        # own copy; gc.freeze() keeps the collector from writing to them.
+        snapshot = self.snapshot()
+        snapshot.index
+        gc.freeze()
+        return snapshot
+
+    def questions(self) -> Sequence[Question]:
+        return self.snapshot().questions
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def save(self, questions: Sequence[Question]) -> None:
+        with self._lock:
+            self.storage.save(questions)
+            self._written()
+
+    def append(self, questions: Iterable[Question], on_duplicate: str = 'keep', near: bool = False) -> Dict[str, int]:
+        with self._lock:
+            counts = self.storage.append(questions, on_duplicate=on_duplicate, near=near)
+            if counts['inserted'] or counts['updated']:
+                self._written()
+        return counts
+
+    def _written(self) -> None:
+        # Stores may reorder on write (JSON splits by subject), so re-read on
+        # next access rather than trusting the caller's list order.
+        if self._snapshot is not None:
+            self.reloads += 1
+        self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        current = self._snapshot
+        return {
+            'storage': self.storage.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'packed': self.packed,
+            'version': current.version if current is not None else 0,
+            'questions': len(current) if current is not None else 0,
+        }
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Mapping
+
+from .indexes import subject_of
+
+
+DUPLICATE_MODES = ('skip', 'upsert', 'keep')
+
+_WS_RE = re.compile(r'\s+')
+_PUNCT_RE = re.compile(r'[^\w\s]')
+
+
+def _strict(value: Any) -> str:
+    return _WS_RE.sub(' ', str(value or '')).strip()
+
+
+def _loose(value: Any) -> str:
+    # Near-duplicate form: case-folded, punctuation dropped, whitespace collapsed
+    return _WS_RE.sub(' ', _PUNCT_RE.sub(' ', str(value or '').casefold())).strip()
+
+
+_BASE_KEYS = ('A', 'B', 'C', 'D')
+
+
+def _digest(q: Mapping[str, Any], norm) -> str:
+    options = q.get('options') or {}
+    parts = [subject_of(q), norm(q.get('text'))]
+    # A-D always take one slot each (empty when missing), which keeps the
+    # hashes already stored in SQLite valid; any other option (E, ...) is
+    # added as key and text, in sorted order
+    for key in _BASE_KEYS:
+        parts.append(norm(options.get(key)))
+    for key in sorted(k for k in options if k not in _BASE_KEYS):
+        parts.append(key)
+        parts.append(norm(options.get(key)))
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def content_hash(q: Mapping[str, Any]) -> str:
+    # Stable over subject, question text and option texts; the answer and
+    # topic are deliberately excluded so an upsert can correct them.
+    return _digest(q, _strict)
+
+
+def near_hash(q: Mapping[str, Any]) -> str:
+    return _digest(q, _loose)
+
+
+def dedup_key(q: Mapping[str, Any], near: bool = False) -> str:
+    return near_hash(q) if near else content_hash(q)
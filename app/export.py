@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .analytics import question_key
+from .indexes import parse_set_label, subject_of, topic_label
+from .practice import OPTION_KEYS
+from .storage import _thaw
+
+
+# Rows are buffered into chunks of about this many bytes before they are
+# yielded (and compressed), so a large export is many small writes rather
+# than one document
+CHUNK_SIZE = 64 * 1024
+
+QUESTION_COLUMNS = ('id', 'subject', 'set', 'topic', 'text') + OPTION_KEYS + ('other_options', 'answer')
+RESULT_COLUMNS = ('id', 'subject', 'set', 'topic', 'label', 'attempts', 'correct', 'graded', 'accuracy') + tuple(f'chose_{k}' for k in OPTION_KEYS) + ('answer',)
+
+Row = Dict[str, Any]
+
+
+def export_positions(snapshot: Any, subject: Optional[str] = None, set_id: Optional[int] = None,
+                     topic: Optional[str] = None) -> Iterator[int]:
+    # Same selection as filter_by_subject / filter_by_set, read from the
+    # snapshot's indexes: a set filter defaults to BDM, otherwise no subject
+    # means all. `topic` matches the topic label ("Demand", "2025 Jan"),
+    # ignoring case.
+    if set_id is not None:
+        ids: Sequence[int] = snapshot.index.set_ids(subject or 'bdm', set_id)
+    else:
+        ids = snapshot.index.subject_ids(subject or 'all')
+    wanted = topic.strip().lower() if topic else None
+    questions = snapshot.questions
+    for pos in ids:
+        if wanted is None or topic_label(questions[pos].get('topic')).lower() == wanted:
+            yield pos
+
+
+def question_rows(snapshot: Any, positions: Iterable[int]) -> Iterator[Row]:
+    questions = snapshot.questions
+    for pos in positions:
+        q = questions[pos]
+        row = {'id': pos + 1}
+        row.update(q)
+        row['subject'] = subject_of(q)
+        row['set'] = parse_set_label(q.get('topic'))
+        yield row
+
+
+def result_rows(snapshot: Any, positions: Iterable[int], counts: Callable[[int], Optional[List[int]]]) -> Iterator[Row]:
+    # One row per question that has attempts; `counts` looks up a
+    # question's [attempts, correct, graded, A, B, C, D, E] aggregate
+    questions = snapshot.questions
+    for pos in positions:
+        q = questions[pos]
+        row = counts(question_key(q))
+        if not row:
+            continue
+        attempts, correct, graded, *choices = row
+        out = {
+            'id': pos + 1,
+            'subject': subject_of(q),
+            'set': parse_set_label(q.get('topic')),
+            'topic': q.get('topic') or '',
+            'label': topic_label(q.get('topic')),
+            'attempts': attempts,
+            'correct': correct,
+            'graded': graded,
+            'accuracy': round(correct / graded * 100, 1) if graded else None,
+            'answer': q.get('answer'),
+        }
+        out.update(zip((f'chose_{k}' for k in OPTION_KEYS), choices))
+        yield out
+
+
+def jsonl_chunks(rows: Iterable[Row]) -> Iterator[str]:
+    buf: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False, default=_thaw)
+        buf.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            buf.append('')
+            yield '\n'.join(buf)
+            buf = []
+            size = 0
+    if buf:
+        buf.append('')
+        yield '\n'.join(buf)
+
+
+def question_csv_row(row: Row) -> Row:
+    # Options spread over A-E columns; any further letters go to other_options as JSON
+    options = row.get('options') or {}
+    out = {k: row.get(k) for k in ('id', 'subject', 'set', 'topic', 'text', 'answer')}
+    for key in OPTION_KEYS:
+        out[key] = options.get(key)
+    other = {k: v for k, v in options.items() if k not in OPTION_KEYS}
+    out['other_options'] = json.dumps(other, ensure_ascii=False) if other else ''
+    return out
+
+
+def csv_chunks(rows: Iterable[Row], columns: Sequence[str]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= CHUNK_SIZE:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def encode_chunks(chunks: Iterable[str], compress: bool) -> Iterator[bytes]:
+    # UTF-8, optionally gzip-compressed as it streams. Each chunk is
+    # sync-flushed so the client receives rows as they are produced.
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = gz.compress(chunk.encode('utf-8')) + gz.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield gz.flush()
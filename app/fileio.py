@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import stat
+import tempfile
+from typing import Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    # Write to a temp file in the same directory, fsync it, then rename over
+    # the target. Readers see either the old or the new file, never a torn one.
+    atomic_write_chunks(path, (data,), skip_unchanged=False)
+
+
+def atomic_write_chunks(path: str, chunks: Iterable[bytes], skip_unchanged: bool = True) -> bool:
+    # atomic_write for a payload produced piece by piece: chunks go straight
+    # to the temp file, so the whole payload is never held in memory. With
+    # skip_unchanged, a running hash of the chunks is compared with the
+    # current file's and an identical file is left alone. Returns whether the
+    # file was replaced.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        digest = hashlib.blake2b()
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if skip_unchanged:
+                    digest.update(chunk)
+                f.write(chunk)
+            if skip_unchanged and file_digest(path) == digest.digest():
+                os.unlink(tmp_path)
+                return False
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    _fsync_dir(directory)
+    return True
+
+
+def file_digest(path: str) -> bytes:
+    # blake2b of a file read in 1 MB blocks; b'' when it can't be read
+    digest = hashlib.blake2b()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except OSError:
+        return b''
+    return digest.digest()
+
+
+def _fsync_dir(directory: str) -> None:
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    # Exclusive advisory lock on a sidecar file, shared by every worker process.
+    # Only writers take it; readers rely on atomic_write's rename.
+    lock_path = path + '.lock'
+    with open(lock_path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
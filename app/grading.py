@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .practice import OPTION_KEYS, SELECTED_MASK, mask_to_answer, option_mask
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; grading falls back to plain Python
+    np = None
+
+
+# Set bits in an option mask
+_POPCOUNT = bytes(bin(i).count('1') for i in range(SELECTED_MASK + 1))
+
+
+def key_mask(answer: Optional[str]) -> int:
+    # option_mask for answer keys, all or nothing: a key naming a letter the
+    # mask can't hold compiles to 0 (ungradable) rather than to its other
+    # letters, which would mark a wrong selection correct
+    parts = [part.strip().upper() for part in (answer or '').split(',')]
+    if not all(part in OPTION_KEYS for part in parts):
+        return 0
+    return option_mask(answer)
+
+
+def question_credit(key: int, selected: int) -> float:
+    # Full credit for an exact match. For multi-select keys, partial credit is
+    # the share of correct options picked, as long as no wrong option is.
+    if not key or not selected:
+        return 0.0
+    if selected == key:
+        return 1.0
+    if selected & ~key or _POPCOUNT[key] < 2:
+        return 0.0
+    return _POPCOUNT[selected] / _POPCOUNT[key]
+
+
+class AnswerKey:
+    # A set's answer key compiled to one option bitmask byte per question
+    # (A=1 B=2 C=4 D=8 E=16; 0 for no or an ungradable key), so grading works on small integer arrays instead of
+    # comparing answer strings.
+    __slots__ = ('masks', 'answers', '_array')
+
+    def __init__(self, questions: Iterable[Mapping[str, Any]]):
+        answers = [q.get('answer') for q in questions]
+        self.answers: List[Optional[str]] = answers
+        self.masks = bytes(key_mask(a) for a in answers)
+        self._array = None
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def gradable(self, idx: int) -> bool:
+        return self.masks[idx] != 0
+
+    def multi(self, idx: int) -> bool:
+        return _POPCOUNT[self.masks[idx]] > 1
+
+    def encode(self, form: Any, prefix: str = 'ans_') -> bytes:
+        # One mask per question from form fields ans_1..ans_N (checkboxes may repeat)
+        masks = bytearray(len(self.masks))
+        for idx in range(len(self.masks)):
+            for value in form.getlist(f'{prefix}{idx + 1}'):
+                masks[idx] |= option_mask(value)
+        return bytes(masks)
+
+    def credits(self, selected: bytes) -> List[float]:
+        return [question_credit(k, s) for k, s in zip(self.masks, selected)]
+
+    def grade(self, selected: bytes) -> Dict[str, Any]:
+        credits = self.credits(selected)
+        results: Dict[int, Dict[str, Any]] = {}
+        for idx, credit in enumerate(credits):
+            results[idx + 1] = {
+                'selected': mask_to_answer(selected[idx]),
+                'is_correct': credit == 1.0,
+                'credit': credit,
+                'correct': self.answers[idx],
+            }
+        return {'score': sum(credits), 'total': len(credits), 'results': results}
+
+    def grade_batch(self, submissions: Sequence[bytes]) -> List[float]:
+        # Scores for many stored submissions at once, e.g. re-scoring archived
+        # attempts after an answer-key correction.
+        if np is None:
+            return [sum(self.credits(sub)) for sub in submissions]
+        if not submissions:
+            return []
+        key = self._key_array()
+        sel = np.frombuffer(b''.join(submissions), dtype=np.uint8).reshape(len(submissions), len(self.masks))
+        popcount = np.frombuffer(_POPCOUNT, dtype=np.uint8)
+        key_bits = popcount[key].astype(np.float32)
+        hits = popcount[sel & key].astype(np.float32)
+        clean = (sel & ~key) == 0
+        partial = np.where(clean & (key_bits > 1), hits / np.maximum(key_bits, 1), 0.0)
+        credit = np.where((sel == key) & (key != 0), 1.0, partial)
+        credit[:, key == 0] = 0.0
+        return credit.sum(axis=1).tolist()
+
+    def _key_array(self):
+        if self._array is None:
+            self._array = np.frombuffer(self.masks, dtype=np.uint8)
+        return self._array
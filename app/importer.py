@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from .practice import OPTION_KEYS
+from .textbank import read_text_questions
+
+
+CHUNK_SIZE = 64 * 1024
+# Largest single JSON value we'll buffer while waiting for it to complete
+MAX_ITEM_SIZE = 16 * 1024 * 1024
+
+_WRAPPER_RE = re.compile(r'\{\s*"questions"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+
+def normalize_question(item: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(item, dict):
+        return None
+    text = str(item.get('text', '')).strip()
+    options = item.get('options')
+    answer = str(item.get('answer') or '').strip().upper() or None
+    topic = str(item.get('topic', '') or item.get('set', '') or '').strip()
+    subject = str(item.get('subject', 'bdm') or 'bdm').strip()
+    if not text or not isinstance(options, dict):
+        return None
+
+    fixed_options: Dict[str, str] = {}
+    for key in OPTION_KEYS:
+        val = options.get(key)
+        if val is not None:
+            fixed_options[key] = str(val)
+    if len(fixed_options) < 2:
+        return None
+    if answer:
+        # "A" or a multi-select key such as "A,C"; ignore invalid answers
+        keys = [part.strip() for part in answer.split(',')]
+        answer = ','.join(sorted(set(keys))) if all(k in fixed_options for k in keys) else None
+    return {'text': text, 'options': fixed_options, 'answer': answer, 'topic': topic, 'subject': subject}
+
+
+class _Reader:
+    # Sliding text buffer over a stream, refilled in CHUNK_SIZE reads
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip(self, chars: str = ' \t\r\n') -> str:
+        # Advance past `chars` and return the next character ('' at EOF)
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in chars:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def decode(self) -> Any:
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if len(self.buf) - self.pos > MAX_ITEM_SIZE or not self.fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(stream: TextIO) -> Iterator[Any]:
+    # Yields items from a JSON array, a {"questions": [...]} document, or JSON
+    # Lines, holding at most one item (plus a read chunk) in memory.
+    reader = _Reader(stream)
+    # A UTF-8 BOM (Windows editors, Excel exports) read through a plain
+    # utf-8 decoder arrives as U+FEFF; skip it with the leading whitespace,
+    # as sniff_format does
+    first = reader.skip('\ufeff \t\r\n')
+    if not first:
+        return
+    if first == '{':
+        while len(reader.buf) - reader.pos < 64 and reader.fill():
+            pass
+        match = _WRAPPER_RE.match(reader.buf, reader.pos)
+        if match:
+            reader.pos = match.end() - 1
+            first = '['
+    if first == '[':
+        reader.pos += 1
+        if reader.skip() == ']':
+            return
+        while True:
+            if not reader.skip():
+                raise json.JSONDecodeError('Unterminated array', reader.buf, reader.pos)
+            yield reader.decode()
+            nxt = reader.skip()
+            if nxt == ',':
+                reader.pos += 1
+            elif nxt == ']':
+                return
+            else:
+                raise json.JSONDecodeError("Expecting ',' delimiter", reader.buf, reader.pos)
+
+    # JSON Lines (or a single object): one value after another
+    while reader.skip():
+        value = reader.decode()
+        if isinstance(value, dict) and isinstance(value.get('questions'), list) and 'text' not in value:
+            yield from value['questions']
+        else:
+            yield value
+
+
+class ImportReport:
+    # accepted counts valid items, including duplicates that were then
+    # skipped (`duplicates`) or merged into an existing question (`updated`)
+    __slots__ = ('accepted', 'rejected', 'duplicates', 'updated', 'elapsed')
+
+    def __init__(self) -> None:
+        self.accepted = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.updated = 0
+        self.elapsed = 0.0
+
+    @property
+    def inserted(self) -> int:
+        return self.accepted - self.duplicates - self.updated
+
+    @property
+    def rate(self) -> float:
+        total = self.accepted + self.rejected
+        return total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'accepted': self.accepted,
+            'inserted': self.inserted,
+            'rejected': self.rejected,
+            'duplicates': self.duplicates,
+            'updated': self.updated,
+            'seconds': round(self.elapsed, 3),
+            'items_per_second': round(self.rate, 1),
+        }
+
+
+def normalize_stream(items: Iterable[Any], report: ImportReport) -> Iterator[Dict[str, Any]]:
+    for item in items:
+        question = normalize_question(item)
+        if question is None:
+            report.rejected += 1
+            continue
+        report.accepted += 1
+        yield question
+
+
+def import_items(items: Iterable[Any], sink: Any, on_duplicate: str = 'skip', near: bool = False) -> ImportReport:
+    # `sink` is a QuestionBank or storage backend; its append() consumes the
+    # generator in batches, so parsing, normalizing and writing are pipelined.
+    report = ImportReport()
+    started = time.perf_counter()
+    counts = sink.append(normalize_stream(items, report), on_duplicate=on_duplicate, near=near)
+    report.duplicates = counts['duplicates']
+    report.updated = counts['updated']
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def import_stream(stream: TextIO, sink: Any, on_duplicate: str = 'skip', near: bool = False) -> ImportReport:
+    return import_items(iter_json_items(stream), sink, on_duplicate=on_duplicate, near=near)
+
+
+def import_text(stream: TextIO, sink: Any, subject: str = 'bdm', on_duplicate: str = 'skip', near: bool = False) -> ImportReport:
+    # Plain-text "Question Bank" dumps (see textbank.py)
+    return import_items(read_text_questions(stream, subject=subject), sink, on_duplicate=on_duplicate, near=near)
+
+
+class _Prefixed:
+    # Puts text already read off a stream back in front of it
+    def __init__(self, head: str, stream: TextIO):
+        self.head = head
+        self.stream = stream
+
+    def read(self, size: int = -1) -> str:
+        if self.head:
+            head, self.head = self.head, ''
+            return head
+        return self.stream.read(size)
+
+
+def sniff_format(stream: TextIO) -> Tuple[str, TextIO]:
+    # 'json' for arrays, {"questions": [...]} and JSON Lines, otherwise 'text'.
+    # Returns a stream that still yields the sniffed text.
+    head = stream.read(CHUNK_SIZE)
+    fmt = 'json' if head.lstrip('\ufeff \t\r\n')[:1] in ('[', '{') else 'text'
+    return fmt, _Prefixed(head, stream)
+
+
+def import_auto(stream: TextIO, sink: Any, subject: str = 'bdm', on_duplicate: str = 'skip', near: bool = False) -> ImportReport:
+    fmt, stream = sniff_format(stream)
+    if fmt == 'json':
+        return import_stream(stream, sink, on_duplicate=on_duplicate, near=near)
+    return import_text(stream, sink, subject=subject, on_duplicate=on_duplicate, near=near)
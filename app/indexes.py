@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+# "Set 1 Q3 - Demand", "MAD2 Set1 Q1 - Hoisting"
+SET_LABEL_RE = re.compile(r'^\s*(?:mad2\s*)?set\s*(\d+)\b', re.IGNORECASE)
+
+# Trailing question number of a topic without a " - Name" part: "2025 Jan Q7 (...)"
+QUESTION_NO_RE = re.compile(r'\s*\bQ\d+\b.*$', re.IGNORECASE)
+
+SUBJECTS = ('bdm', 'mad2')
+
+
+def parse_set_label(topic: Optional[str]) -> Optional[int]:
+    match = SET_LABEL_RE.match(topic or '')
+    return int(match.group(1)) if match else None
+
+
+def topic_label(topic: Optional[str]) -> str:
+    # "Set 1 Q3 - Demand" -> "Demand", "2025 Jan Q7 (multi-select)" -> "2025 Jan"
+    topic = (topic or '').strip()
+    if ' - ' in topic:
+        return topic.split(' - ', 1)[1].strip() or 'General'
+    return QUESTION_NO_RE.sub('', topic).strip() or 'General'
+
+
+def subject_of(q: Mapping[str, Any]) -> str:
+    return (q.get('subject') or 'bdm').strip().lower()
+
+
+def normalize_subject(subject: Optional[str]) -> str:
+    # Unknown subjects fall back to BDM, matching the practice routes
+    subject = (subject or 'bdm').strip().lower()
+    return subject if subject in SUBJECTS or subject == 'all' else 'bdm'
+
+
+class BankIndex:
+    # Positions into the snapshot's question tuple, built once per bank version:
+    #   by_subject[subject]         -> ordered positions
+    #   by_set[(subject, set_id)]   -> ordered positions
+    __slots__ = ('size', 'by_subject', 'by_set')
+
+    def __init__(self, questions: Sequence[Mapping[str, Any]]):
+        by_subject: Dict[str, List[int]] = {}
+        by_set: Dict[Tuple[str, int], List[int]] = {}
+        for pos, q in enumerate(questions):
+            subject = subject_of(q)
+            by_subject.setdefault(subject, []).append(pos)
+            set_id = parse_set_label(q.get('topic'))
+            if set_id is not None:
+                by_set.setdefault((subject, set_id), []).append(pos)
+
+        self.size = len(questions)
+        self.by_subject: Dict[str, Tuple[int, ...]] = {k: tuple(v) for k, v in by_subject.items()}
+        self.by_set: Dict[Tuple[str, int], Tuple[int, ...]] = {k: tuple(v) for k, v in by_set.items()}
+
+    @classmethod
+    def from_ids(cls, size: int, by_subject: Dict[str, Tuple[int, ...]],
+                 by_set: Dict[Tuple[str, int], Tuple[int, ...]]) -> 'BankIndex':
+        # Rebuild from precomputed positions (see packed.py) without scanning topics
+        index = cls.__new__(cls)
+        index.size = size
+        index.by_subject = by_subject
+        index.by_set = by_set
+        return index
+
+    def subject_ids(self, subject: str) -> Sequence[int]:
+        subject = normalize_subject(subject)
+        if subject == 'all':
+            return range(self.size)
+        return self.by_subject.get(subject, ())
+
+    def set_ids(self, subject: str, set_id: int) -> Sequence[int]:
+        return self.by_set.get((normalize_subject(subject), set_id), ())
+
+    def sets(self, subject: str) -> List[Dict[str, int]]:
+        subject = normalize_subject(subject)
+        return [
+            {'id': set_id, 'count': len(ids)}
+            for (subj, set_id), ids in sorted(self.by_set.items())
+            if subj == subject
+        ]
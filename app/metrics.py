@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+# Upper bounds (seconds) of the latency histogram buckets; one extra +Inf
+# bucket catches the rest
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Endpoint of the request being served, so spans deep in the data layer are
+# attributed without passing it around
+_endpoint: 'contextvars.ContextVar[str]' = contextvars.ContextVar('endpoint', default='-')
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Registry:
+    # Fixed-bucket histograms and counters keyed by (metric, labels). One
+    # observation is a bisect over 14 bounds and three additions under a lock.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+
+    def observe(self, name: str, labels: Tuple[Tuple[str, str], ...], seconds: float) -> None:
+        key = (name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    def inc(self, name: str, labels: Tuple[Tuple[str, str], ...], amount: int = 1) -> None:
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot(self) -> Tuple[Dict[Any, Tuple[List[int], float, int]], Dict[Any, int]]:
+        with self._lock:
+            hists = {key: (list(h.counts), h.sum, h.count) for key, h in self.histograms.items()}
+            return hists, dict(self.counters)
+
+
+registry = Registry()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    # Time one phase of the current request: load, filter, grade, session, render, ...
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe('bank_span_duration_seconds', (('endpoint', _endpoint.get()), ('span', name)),
+                         time.perf_counter() - started)
+
+
+class TimedStore:
+    # Wraps a practice session store so its reads and writes show up as the
+    # 'session' span
+    def __init__(self, store: Any):
+        self.store = store
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.store, name)
+
+    def get(self, sid: str, key: str):
+        with span('session'):
+            return self.store.get(sid, key)
+
+    def set(self, sid: str, key: str, value: bytes) -> None:
+        with span('session'):
+            self.store.set(sid, key, value)
+
+    def delete(self, sid: str, key: str) -> None:
+        with span('session'):
+            self.store.delete(sid, key)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{k}="{_escape(str(v))}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+HELP = {
+    'bank_request_duration_seconds': ('histogram', 'Request latency by endpoint'),
+    'bank_span_duration_seconds': ('histogram', 'Time spent in one phase of a request (load, filter, grade, session, render)'),
+    'bank_requests_total': ('counter', 'Requests by endpoint, method and status'),
+}
+
+
+def render_prometheus(gauges: Dict[str, Tuple[str, float]]) -> str:
+    # Prometheus text exposition format (version 0.0.4)
+    hists, counters = registry.snapshot()
+    lines: List[str] = []
+    seen = set()
+
+    def header(name: str, kind: str, text: str) -> None:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+    for (name, labels), (counts, total, count) in sorted(hists.items()):
+        header(name, *HELP.get(name, ('histogram', name)))
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float('inf'),), counts):
+            cumulative += n
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{_labels(labels, "le=" + chr(34) + le + chr(34))} {cumulative}')
+        lines.append(f'{name}_sum{_labels(labels)} {total}')
+        lines.append(f'{name}_count{_labels(labels)} {count}')
+    for (name, labels), value in sorted(counters.items()):
+        header(name, *HELP.get(name, ('counter', name)))
+        lines.append(f'{name}{_labels(labels)} {value}')
+    for name, (text, value) in sorted(gauges.items()):
+        header(name, 'counter' if name.endswith('_total') else 'gauge', text)
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+_UNSAFE_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def init_metrics(app: Any) -> None:
+    # Per-request timing, template render spans, /metrics, and the opt-in
+    # profiler. With PROFILE_DIR unset the profiler costs one dict lookup
+    # per request.
+    from flask import Response, g, request, template_rendered, before_render_template
+
+    profile_dir = app.config.get('PROFILE_DIR')
+    sample_rate = float(app.config.get('PROFILE_SAMPLE_RATE') or 0)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    @app.before_request
+    def start_timer():
+        g._metrics_token = _endpoint.set(request.endpoint or '-')
+        g._metrics_started = time.perf_counter()
+        if profile_dir and (request.headers.get('X-Profile') or (sample_rate and random.random() < sample_rate)):
+            g._profiler = cProfile.Profile()
+            g._profiler.enable()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('_metrics_started', None)
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            name = _UNSAFE_RE.sub('_', request.endpoint or 'unknown')
+            path = os.path.join(profile_dir, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{name}-{int(time.time() * 1000) % 1000:03d}.prof')
+            profiler.dump_stats(path)
+            response.headers['X-Profile-File'] = os.path.basename(path)
+        if started is not None:
+            endpoint = request.endpoint or '-'
+            registry.observe('bank_request_duration_seconds', (('endpoint', endpoint), ('method', request.method)),
+                             time.perf_counter() - started)
+            registry.inc('bank_requests_total', (('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))))
+        return response
+
+    @app.teardown_request
+    def reset_endpoint(exc=None):
+        token = g.pop('_metrics_token', None)
+        if token is not None:
+            _endpoint.reset(token)
+
+    def render_started(sender, template, context, **extra):
+        g.setdefault('_render_started', []).append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        stack = g.get('_render_started')
+        if stack:
+            registry.observe('bank_span_duration_seconds', (('endpoint', _endpoint.get()), ('span', 'render')),
+                             time.perf_counter() - stack.pop())
+
+    # weak=False: blinker holds weak references and these are local functions
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    def metrics():
+        from .routes import bank, pages
+        bank_stats = bank.stats()
+        page_stats = pages.stats()
+        attempts = app.extensions['attempts'].summary()
+        gauges = {
+            'bank_questions': ('Questions in the current bank snapshot', bank_stats['questions']),
+            'bank_snapshot_hits_total': ('Bank accesses served from the cached snapshot', bank_stats['hits']),
+            'bank_snapshot_reloads_total': ('Bank snapshot rebuilds after a change', bank_stats['reloads']),
+            'bank_page_cache_hits_total': ('Rendered pages served from the page cache', page_stats['hits']),
+            'bank_page_cache_misses_total': ('Rendered pages that had to be rendered', page_stats['misses']),
+            'bank_page_cache_bytes': ('Bytes held by the page cache', page_stats['bytes']),
+            'bank_attempts_pending': ('Attempts queued for the analytics writer', attempts['pending']),
+            'bank_attempts_total': ('Attempts folded into the analytics aggregates', attempts['attempts']),
+        }
+        return Response(render_prometheus(gauges), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
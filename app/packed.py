@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .fileio import atomic_write
+from .indexes import BankIndex
+from .records import FIELDS, Options, QuestionRecord, freeze
+
+
+# Precompiled, memory-mapped question bank. `python manage.py pack` compiles
+# the JSON files into one file; the app maps it and decodes a question only
+# when it is first touched, so startup cost does not grow with the bank.
+#
+# Layout (little-endian; everything but the blob is 4-byte aligned):
+#   HEADER
+#   RECORD * count          where each question's strings sit in the blob
+#   uint32 * positions      subject and set index positions
+#   directory               JSON: index ranges into the positions array
+#   blob                    per question, its present fields joined by NUL:
+#                           text, option letters, option texts, answer,
+#                           topic, subject, other keys as JSON
+#
+# Decoding a question is one slice, one UTF-8 decode and one split.
+# The header records the size, mtime and blake2b digest of both JSON files;
+# a pack whose sources changed is stale and the bank falls back to JSON.
+
+MAGIC = b'QBPK'
+FORMAT_VERSION = 1
+
+# magic, version, flags, count, positions, directory length, source
+# digest, then (size, mtime_ns) of each source file
+HEADER = struct.Struct('<4sHHIII16sqqqq')
+# blob offset, blob length, option count, field flags
+RECORD = struct.Struct('<IIHH')
+
+SEP = '\0'
+
+# Field flags: which parts are present in the question's blob
+HAS_TEXT = 1
+HAS_OPTIONS = 2
+HAS_ANSWER = 4
+HAS_TOPIC = 8
+HAS_SUBJECT = 16
+HAS_EXTRA = 32
+# The blob is the whole question as JSON (non-string fields, NULs in text)
+RAW = 64
+
+SourceState = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+def source_state(paths: Sequence[str]) -> SourceState:
+    state = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            state.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            state.append((-1, -1))
+    return tuple(state)
+
+
+def source_digest(paths: Sequence[str]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+        except OSError:
+            pass
+        h.update(b'\0')
+    return h.digest()
+
+
+def _pack_one(q: Mapping[str, Any]) -> Tuple[str, int, int]:
+    # (blob text, option count, flags); RAW unless every known field is a
+    # NUL-free string (or a mapping of them, for options)
+    parts: List[str] = []
+    flags = 0
+    n_options = 0
+    for key, flag in (('text', HAS_TEXT), ('options', HAS_OPTIONS), ('answer', HAS_ANSWER),
+                      ('topic', HAS_TOPIC), ('subject', HAS_SUBJECT)):
+        if key not in q:
+            continue
+        value = q[key]
+        if key == 'options' and isinstance(value, Mapping):
+            values = list(value.items())
+            if not all(isinstance(k, str) and isinstance(v, str) for k, v in values):
+                break
+            parts.extend(k for k, _ in values)
+            parts.extend(v for _, v in values)
+            n_options = len(values)
+        elif isinstance(value, str):
+            parts.append(value)
+        else:
+            break
+        flags |= flag
+    else:
+        extra = {key: q[key] for key in q if key not in FIELDS}
+        if extra:
+            parts.append(json.dumps(extra, ensure_ascii=False))
+            flags |= HAS_EXTRA
+        if not any(SEP in part for part in parts):
+            return SEP.join(parts), n_options, flags
+    return json.dumps(dict(q), ensure_ascii=False, default=dict), 0, RAW
+
+
+def pack_questions(questions: Sequence[Mapping[str, Any]], sources: Sequence[str]) -> bytes:
+    records = bytearray()
+    blob = bytearray()
+    for q in questions:
+        data, n_options, flags = _pack_one(q)
+        data = data.encode('utf-8')
+        records += RECORD.pack(len(blob), len(data), n_options, flags)
+        blob += data
+
+    index = BankIndex(questions)
+    positions: List[int] = []
+    directory: Dict[str, List[Any]] = {'subjects': [], 'sets': []}
+    for subject, ids in sorted(index.by_subject.items()):
+        directory['subjects'].append([subject, len(positions), len(ids)])
+        positions.extend(ids)
+    for (subject, set_id), ids in sorted(index.by_set.items()):
+        directory['sets'].append([subject, set_id, len(positions), len(ids)])
+        positions.extend(ids)
+    dir_bytes = json.dumps(directory, separators=(',', ':')).encode('utf-8')
+
+    (size1, mtime1), (size2, mtime2) = source_state(sources)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, len(questions), len(positions), len(dir_bytes),
+        source_digest(sources), size1, mtime1, size2, mtime2,
+    )
+    return b''.join((header, bytes(records), struct.pack(f'<{len(positions)}I', *positions), dir_bytes, bytes(blob)))
+
+
+def write_pack(path: str, questions: Iterable[Mapping[str, Any]], sources: Sequence[str]) -> int:
+    # Questions are frozen first so the pack holds exactly what a JSON load
+    # would put in a snapshot (subject defaults included)
+    frozen = [freeze(q) for q in questions if isinstance(q, Mapping)]
+    atomic_write(path, pack_questions(frozen, sources))
+    return len(frozen)
+
+
+class PackedBank:
+    # A mapped pack file. Raises ValueError for a file this version can't read.
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if len(mm) < HEADER.size:
+            raise ValueError(f'{path}: truncated question pack')
+        (magic, version, _, self.count, n_positions, dir_len,
+         self.digest, size1, mtime1, size2, mtime2) = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{path}: not a version {FORMAT_VERSION} question pack')
+        self.state: SourceState = ((size1, mtime1), (size2, mtime2))
+
+        offset = HEADER.size
+        self._records = offset
+        offset += self.count * RECORD.size
+        self._positions = memoryview(mm)[offset:offset + n_positions * 4].cast('I')
+        offset += n_positions * 4
+        self._directory = json.loads(mm[offset:offset + dir_len])
+        self._blob = offset + dir_len
+        if self.count:
+            last, length, _, _ = RECORD.unpack_from(mm, self._records + (self.count - 1) * RECORD.size)
+            if self._blob + last + length > len(mm):
+                raise ValueError(f'{path}: truncated question pack')
+        self.questions = PackedQuestions(self)
+
+    def matches(self, sources: Sequence[str]) -> bool:
+        # Cheap stat check first; equal content with a new mtime (a fresh
+        # checkout or deploy) still counts as fresh
+        return source_state(sources) == self.state or source_digest(sources) == self.digest
+
+    def index(self) -> BankIndex:
+        positions = self._positions
+        by_subject = {subject: tuple(positions[start:start + n]) for subject, start, n in self._directory['subjects']}
+        by_set = {(subject, set_id): tuple(positions[start:start + n]) for subject, set_id, start, n in self._directory['sets']}
+        return BankIndex.from_ids(self.count, by_subject, by_set)
+
+    def decode(self, pos: int) -> QuestionRecord:
+        offset, length, n_options, flags = RECORD.unpack_from(self._mm, self._records + pos * RECORD.size)
+        start = self._blob + offset
+        data = self._mm[start:start + length].decode('utf-8')
+        if flags & RAW:
+            return freeze(json.loads(data))
+        parts = data.split(SEP)
+        i = 0
+        text = options = answer = topic = subject = extra = None
+        if flags & HAS_TEXT:
+            text = parts[0]
+            i = 1
+        if flags & HAS_OPTIONS:
+            options = Options.from_pairs(tuple(parts[i:i + n_options]), tuple(parts[i + n_options:i + 2 * n_options]))
+            i += 2 * n_options
+        if flags & HAS_ANSWER:
+            answer = parts[i]
+            i += 1
+        if flags & HAS_TOPIC:
+            topic = parts[i]
+            i += 1
+        if flags & HAS_SUBJECT:
+            subject = parts[i]
+            i += 1
+        if flags & HAS_EXTRA:
+            extra = json.loads(parts[i])
+        return QuestionRecord.from_fields(text, options, answer, topic, subject, extra)
+
+
+class PackedQuestions(Sequence):
+    # Stands in for the snapshot's question tuple. Each question is decoded
+    # from the map on first access and kept; a racing duplicate decode is
+    # harmless.
+    __slots__ = ('_pack', '_cache')
+
+    def __init__(self, pack: PackedBank):
+        self._pack = pack
+        self._cache: List[Optional[QuestionRecord]] = [None] * pack.count
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return tuple(self[i] for i in range(*item.indices(len(self))))
+        q = self._cache[item]
+        if q is None:
+            if item < 0:
+                item += len(self._cache)
+            q = self._cache[item] = self._pack.decode(item)
+        return q
+
+    def __iter__(self):
+        for i in range(len(self._cache)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f'<PackedQuestions {len(self)} questions>'
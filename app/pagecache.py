@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import make_response, request, session
+
+
+class PageCache:
+    # Rendered HTML for read-only pages, keyed by (endpoint, view args, query
+    # string, bank version). Writes through the bank start a new version, so
+    # stale pages are never served; the whole cache is dropped when the
+    # version moves on. Bounded by entry count and total bytes (LRU).
+    #
+    # Responses carry a content-hash ETag and Last-Modified (when the stored
+    # bank last changed, so every worker sends the same value) and answer
+    # conditional GETs with 304.
+
+    def __init__(self, bank: Any, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        self.bank = bank
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pages: 'OrderedDict[Tuple[Any, ...], Tuple[bytes, str, float]]' = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Tuple[Any, ...], version: int) -> Optional[Tuple[bytes, str, float]]:
+        with self._lock:
+            if version != self._version:
+                self._reset(version)
+                return None
+            entry = self._pages.get(key)
+            if entry is not None:
+                self._pages.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[Any, ...], version: int, body: bytes, modified: float) -> Tuple[bytes, str, float]:
+        entry = (body, hashlib.blake2b(body, digest_size=12).hexdigest(), modified)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if version != self._version:
+                self._reset(version)
+            old = self._pages.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._pages[key] = entry
+            self._bytes += len(body)
+            while len(self._pages) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _, _) = self._pages.popitem(last=False)
+                self._bytes -= len(evicted)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset(None)
+
+    def _reset(self, version: Optional[int]) -> None:
+        self._pages.clear()
+        self._bytes = 0
+        self._version = version
+
+    def cached(self, view: Callable[..., Any]) -> Callable[..., Any]:
+        # Only GET/HEAD renders are cached; redirects and other non-HTML returns
+        # pass through untouched. A pending flash message is part of the page,
+        # so those requests render fresh.
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            snapshot = self.bank.snapshot()
+            key = (request.endpoint, tuple(sorted(kwargs.items())), request.query_string)
+            entry = self.get(key, snapshot.version)
+            if entry is None:
+                self.misses += 1
+                rendered = view(*args, **kwargs)
+                if not isinstance(rendered, str):
+                    return rendered
+                entry = self.put(key, snapshot.version, rendered.encode('utf-8'), snapshot.modified)
+            else:
+                self.hits += 1
+
+            body, etag, modified = entry
+            response = make_response(body)
+            response.set_etag(etag)
+            response.last_modified = modified
+            # Browsers and the CDN may store the page but must revalidate it
+            response.cache_control.no_cache = True
+            response = response.make_conditional(request)
+            if response.status_code == 304:
+                self.not_modified += 1
+            return response
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._pages),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+        }
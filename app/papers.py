@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import random
+import zlib
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+
+PAPER_SIZE = 25
+PAPER_MAX = 100
+# Minutes allowed per question on a generated paper (a 25-question paper
+# gets the same hour as the predicted sets)
+MINUTES_PER_QUESTION = 2.4
+SEED_MAX = 2 ** 31 - 1
+
+
+def quotas(strata: Mapping[str, Sequence[int]], size: int, fixed: Optional[Mapping[str, int]] = None) -> Dict[str, int]:
+    # Questions to draw per topic. Explicit quotas are honoured first (capped
+    # at what the topic has); the rest of the paper is split across topics in
+    # proportion to their size, largest remainder first. O(topics).
+    counts: Dict[str, int] = {}
+    remaining = size
+    for topic, want in (fixed or {}).items():
+        if topic in strata and want > 0:
+            counts[topic] = min(want, len(strata[topic]), remaining)
+            remaining -= counts[topic]
+    if fixed or remaining <= 0:
+        return {topic: n for topic, n in counts.items() if n}
+
+    pool = {topic: len(ids) for topic, ids in strata.items() if ids}
+    total = sum(pool.values())
+    if not total:
+        return counts
+    remaining = min(remaining, total)
+    shares = {topic: remaining * n / total for topic, n in pool.items()}
+    for topic, share in shares.items():
+        counts[topic] = int(share)
+    left = remaining - sum(counts.values())
+    for topic in sorted(shares, key=lambda t: (-(shares[t] - int(shares[t])), t))[:left]:
+        counts[topic] += 1
+    return {topic: n for topic, n in counts.items() if n}
+
+
+def generate_paper(strata: Mapping[str, Sequence[int]], size: int, seed: int, fixed: Optional[Mapping[str, int]] = None) -> List[int]:
+    # Positions for a paper of `size` questions. The same strata, size and
+    # seed always give the same paper, so it can be rebuilt at grading time
+    # instead of being stored. Sampling indexes into each topic's position
+    # array, so the cost is O(size + topics), independent of the bank size.
+    rng = random.Random(seed)
+    picked: List[int] = []
+    for topic, n in sorted(quotas(strata, size, fixed).items()):
+        ids = strata[topic]
+        picked.extend(ids[i] for i in rng.sample(range(len(ids)), n))
+    rng.shuffle(picked)
+    return picked
+
+
+def paper_checksum(questions: Sequence[Mapping[str, Any]]) -> str:
+    # Submitted with the answers; a mismatch means the bank changed between
+    # serving and grading the paper
+    crc = 0
+    for q in questions:
+        crc = zlib.crc32(str(q.get('text', '')).encode('utf-8'), crc)
+    return f'{crc:08x}'
+
+
+def parse_quotas(values: Sequence[str]) -> Dict[str, int]:
+    # "Demand:3" -> {'Demand': 3}; malformed entries are ignored
+    fixed: Dict[str, int] = {}
+    for value in values:
+        topic, _, count = value.rpartition(':')
+        if topic.strip() and count.strip().isdigit():
+            fixed[topic.strip()] = int(count)
+    return fixed
+
+
+def new_seed() -> int:
+    return random.SystemRandom().randint(1, SEED_MAX)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Dict, List, Optional
+
+
+# Option letters a selection or answer key can encode; anything else
+# encodes to 0 (nothing selected)
+OPTION_KEYS = ('A', 'B', 'C', 'D', 'E')
+
+# One byte per question position:
+#   bits 0-4  selected option(s), A=1 B=2 C=4 D=8 E=16
+#   bit 5     answered but ungraded (question has no answer key)
+#   bit 6     correct
+#   bit 7     answered
+SELECTED_MASK = 0x1F
+UNGRADED = 0x20
+CORRECT = 0x40
+ANSWERED = 0x80
+
+
+def option_mask(answer: Optional[str]) -> int:
+    mask = 0
+    for part in (answer or '').split(','):
+        part = part.strip().upper()
+        if part in OPTION_KEYS:
+            mask |= 1 << OPTION_KEYS.index(part)
+    return mask
+
+
+def mask_to_answer(mask: int) -> Optional[str]:
+    keys = [key for bit, key in enumerate(OPTION_KEYS) if mask & (1 << bit)]
+    return ','.join(keys) or None
+
+
+# Serialized layout: MAGIC, header (size, answered, correct), one state byte
+# per question, then the per-topic counters as compact JSON.
+MAGIC = b'P\x01'
+HEADER = struct.Struct('<III')
+
+
+class PracticeProgress:
+    # Answer states for one practice run plus running totals, stored
+    # server-side as raw bytes. Recording an answer updates the counters in
+    # O(1), so neither the request nor the summary rescans earlier answers.
+    __slots__ = ('states', 'answered', 'correct', 'topics')
+
+    def __init__(self, size: int, data: Optional[bytes] = None):
+        self.answered = 0
+        self.correct = 0
+        # topic label -> [answered, correct]
+        self.topics: Dict[str, List[int]] = {}
+        if data and data[:len(MAGIC)] == MAGIC:
+            self._decode(data)
+        else:
+            # Raw state bytes from before the header existed: recount once
+            self.states = bytearray(data or b'')
+            for state in self.states:
+                if state & ANSWERED:
+                    self.answered += 1
+                    if state & CORRECT:
+                        self.correct += 1
+        if len(self.states) < size:
+            # The bank grew since this run started
+            self.states.extend(bytes(size - len(self.states)))
+
+    def _decode(self, data: bytes) -> None:
+        offset = len(MAGIC)
+        size, self.answered, self.correct = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        self.states = bytearray(data[offset:offset + size])
+        offset += size
+        if offset < len(data):
+            self.topics = json.loads(data[offset:].decode('utf-8'))
+
+    def to_bytes(self) -> bytes:
+        topics = json.dumps(self.topics, separators=(',', ':')).encode('utf-8') if self.topics else b''
+        return MAGIC + HEADER.pack(len(self.states), self.answered, self.correct) + bytes(self.states) + topics
+
+    def record(self, pos: int, selected: str, is_correct: Optional[bool], topic: str = 'General') -> None:
+        previous = self.states[pos]
+        state = ANSWERED | option_mask(selected)
+        if is_correct is None:
+            state |= UNGRADED
+        elif is_correct:
+            state |= CORRECT
+
+        counts = self.topics.setdefault(topic, [0, 0])
+        if previous & ANSWERED:
+            # Re-answering replaces the earlier attempt in the totals
+            self.answered -= 1
+            counts[0] -= 1
+            if previous & CORRECT:
+                self.correct -= 1
+                counts[1] -= 1
+        self.answered += 1
+        counts[0] += 1
+        if state & CORRECT:
+            self.correct += 1
+            counts[1] += 1
+        self.states[pos] = state
+
+    def result(self, pos: int, correct_answer: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if pos >= len(self.states):
+            return None
+        state = self.states[pos]
+        if not state & ANSWERED:
+            return None
+        return {
+            'selected_answer': mask_to_answer(state & SELECTED_MASK),
+            'is_correct': None if state & UNGRADED else bool(state & CORRECT),
+            'correct': correct_answer,
+        }
+
+    @property
+    def incorrect(self) -> int:
+        return self.answered - self.correct
+
+    @property
+    def percentage(self) -> float:
+        return (self.correct / self.answered * 100) if self.answered > 0 else 0
+
+    def topic_breakdown(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                'topic': topic,
+                'answered': answered,
+                'correct': correct,
+                'percentage': (correct / answered * 100) if answered else 0,
+            }
+            for topic, (answered, correct) in sorted(self.topics.items())
+            if answered
+        ]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import ItemsView, Mapping, ValuesView
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# Compact read-only question records for bank snapshots. A plain question is
+# two dicts (~650 bytes of containers before any strings); a record is one
+# slotted object plus a two-tuple options object whose letter tuple is shared
+# by every question with the same letters. Short subject/answer/topic values
+# ("bdm", "A,C", "2024 May Q7") are interned so repeats are stored once per
+# process; question and option text is mostly unique and is left alone, as
+# interning it only grows the intern table.
+
+FIELDS = ('text', 'options', 'answer', 'topic', 'subject')
+_FIELD_SET = frozenset(FIELDS)
+
+# ('A', 'B', 'C', 'D') and friends, one tuple per distinct letter sequence
+_LETTERS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+# Longest string worth interning
+INTERN_MAX = 32
+
+_set = object.__setattr__
+
+
+class _OptionItems(ItemsView):
+    __slots__ = ()
+
+    def __iter__(self):
+        return zip(self._mapping._keys, self._mapping._values)
+
+
+class _OptionValues(ValuesView):
+    __slots__ = ()
+
+    def __iter__(self):
+        return iter(self._mapping._values)
+
+
+class Options(Mapping):
+    # Letter -> option text, packed as two parallel tuples
+    __slots__ = ('_keys', '_values')
+
+    def __init__(self, options: Mapping[str, Any]):
+        keys = tuple(options)
+        _set(self, '_keys', _LETTERS.get(keys) or _LETTERS.setdefault(keys, keys))
+        _set(self, '_values', tuple(options.values()))
+
+    @classmethod
+    def from_pairs(cls, keys: Tuple[str, ...], values: Tuple[Any, ...]) -> 'Options':
+        options = cls.__new__(cls)
+        _set(options, '_keys', _LETTERS.get(keys) or _LETTERS.setdefault(keys, keys))
+        _set(options, '_values', values)
+        return options
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError('question options are read-only')
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def items(self) -> _OptionItems:
+        return _OptionItems(self)
+
+    def values(self) -> _OptionValues:
+        return _OptionValues(self)
+
+    def __reduce__(self):
+        return (Options, (dict(self.items()),))
+
+    def __repr__(self) -> str:
+        return f'Options({dict(self.items())!r})'
+
+
+class QuestionRecord(Mapping):
+    # Read-only question. Known fields live in slots (an unset slot means the
+    # key is absent) and are also plain attributes, which is what Jinja's
+    # q.text / q.options lookups hit first; anything else goes to _extra.
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, q: Mapping[str, Any]):
+        extra: Optional[Dict[str, Any]] = None
+        for key, value in q.items():
+            if key == 'options':
+                if isinstance(value, (dict, Mapping)):
+                    value = Options(value)
+            elif key == 'text':
+                pass
+            elif key in _FIELD_SET:
+                if type(value) is str and len(value) <= INTERN_MAX:
+                    value = sys.intern(value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+                continue
+            _set(self, key, value)
+        _set(self, '_extra', extra)
+
+    @classmethod
+    def from_fields(cls, text: Optional[str], options: Optional[Options], answer: Optional[str],
+                    topic: Optional[str], subject: Optional[str], extra: Optional[Dict[str, Any]] = None) -> 'QuestionRecord':
+        # Decoder fast path (see packed.py): None means the key is absent
+        record = cls.__new__(cls)
+        for key, value in zip(FIELDS, (text, options, answer, topic, subject)):
+            if value is not None:
+                if key != 'text' and key != 'options' and len(value) <= INTERN_MAX:
+                    value = sys.intern(value)
+                _set(record, key, value)
+        _set(record, '_extra', extra or None)
+        return record
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError('questions in a bank snapshot are read-only')
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        extra = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Hot path for the data layer; skips Mapping.get's KeyError round trip
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        extra = self._extra
+        return extra.get(key, default) if extra is not None else default
+
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        return (freeze, (dict(self),))
+
+    def __repr__(self) -> str:
+        return f'QuestionRecord({dict(self)!r})'
+
+
+def freeze(q: Mapping[str, Any]) -> QuestionRecord:
+    # Legacy entries without a subject label are BDM questions
+    if not q.get('subject'):
+        q = dict(q, subject='bdm')
+    return QuestionRecord(q)
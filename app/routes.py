@@ -1,10 +1,32 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import io
 import json
+import math
 import os
-from typing import Dict, List, Any
-
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+import re
+import secrets
+import time
+from typing import Dict, List, Any, Mapping, Optional, Sequence
+
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, session, jsonify, current_app
+
+from .analytics import question_key
+from .bank import QuestionBank
+from .dedup import DUPLICATE_MODES
+from .export import QUESTION_COLUMNS, RESULT_COLUMNS, csv_chunks, encode_chunks, export_positions, jsonl_chunks, question_csv_row, question_rows, result_rows
+from .grading import AnswerKey
+from .importer import import_auto
+from .pagecache import PageCache
+from .papers import MINUTES_PER_QUESTION, PAPER_MAX, PAPER_SIZE, generate_paper, new_seed, paper_checksum, parse_quotas
+from .storage import JsonStorage
+from .indexes import SUBJECTS, normalize_subject, parse_set_label, subject_of, topic_label
+from .metrics import span
+from .practice import PracticeProgress
+from .scheduler import ScheduleCache
+from .search import SearchIndex
 
 
 bp = Blueprint('main', __name__)
@@ -12,184 +34,143 @@ bp = Blueprint('main', __name__)
 
 DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'questions.json')
 MAD2_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'mad2_questions.json')
+# Built by `python manage.py pack`; used while it matches the two JSON files
+PACKED_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'questions.pack')
 
 
-def _read_json_array(file_path: str) -> List[Dict[str, Any]]:
-    if not os.path.exists(file_path):
-        return []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception:
-        return []
-    if isinstance(data, dict) and 'questions' in data and isinstance(data['questions'], list):
-        return data['questions']
-    if isinstance(data, list):
-        return data
-    return []
+bank = QuestionBank(JsonStorage(DATA_FILE, MAD2_FILE, PACKED_FILE))
+# Read-only pages are rendered once per bank version (see pagecache.py)
+pages = PageCache(bank)
+# Decoded adaptive-practice schedules, reused while the session store still
+# holds the bytes they were saved as (see scheduler.py)
+schedules = ScheduleCache()
+# Full-text index that follows the bank from version to version (see search.py)
+searcher = SearchIndex()
 
 
 def load_questions() -> List[Dict[str, Any]]:
-    # Merge BDM (default) and MAD2 question banks
-    base = _read_json_array(DATA_FILE)
-    mad2 = _read_json_array(MAD2_FILE)
-
-    # Ensure each question has a subject label; default to 'bdm' for legacy entries
-    normalized: List[Dict[str, Any]] = []
-    for q in base + mad2:
-        if not isinstance(q, dict):
-            continue
-        q = dict(q)
-        if not q.get('subject'):
-            q['subject'] = 'bdm'
-        normalized.append(q)
-    return normalized
+    # Shallow copy of the cached snapshot; callers may append to the list
+    return list(bank.questions())
 
 
 def save_questions(questions: List[Dict[str, Any]]) -> None:
-    # Split questions by subject and persist to respective files
-    bdm_questions: List[Dict[str, Any]] = []
-    mad2_questions: List[Dict[str, Any]] = []
-
-    for q in questions:
-        subject = (q.get('subject') or 'bdm').lower()
-        if subject == 'mad2':
-            mad2_questions.append(q)
-        else:
-            bdm_questions.append(q)
-
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump({'questions': bdm_questions}, f, ensure_ascii=False, indent=2)
-    with open(MAD2_FILE, 'w', encoding='utf-8') as f:
-        json.dump({'questions': mad2_questions}, f, ensure_ascii=False, indent=2)
+    bank.save(questions)
 
 
-def filter_by_set(questions: List[Dict[str, Any]], set_id: int) -> List[Dict[str, Any]]:
-    label = f"Set {set_id}"
-    filtered: List[Dict[str, Any]] = []
-    for q in questions:
-        topic = (q.get('topic') or '').strip()
-        if topic.startswith(label):
-            filtered.append(q)
-    return filtered
+def filter_by_set(questions: List[Dict[str, Any]], set_id: int, subject: str = 'bdm') -> List[Dict[str, Any]]:
+    # Linear fallback for ad-hoc lists; routes use the bank's set index instead
+    subject = normalize_subject(subject)
+    return [
+        q for q in questions
+        if subject_of(q) == subject and parse_set_label(q.get('topic')) == set_id
+    ]
 
 
 def filter_by_subject(questions: List[Dict[str, Any]], subject: str) -> List[Dict[str, Any]]:
+    subject = normalize_subject(subject)
     if subject == 'all':
         return questions
-    
-    # Default to BDM if no subject specified
-    if not subject or subject == 'bdm':
-        # All current questions are BDM-related
-        return questions
-    
-    elif subject == 'mad2':
-        # Filter for MAD2 questions (you can add MAD2 questions later)
-        mad2_questions = []
-        for q in questions:
-            topic = (q.get('topic') or '').lower()
-            if 'mad2' in topic or 'mobile' in topic or 'app' in topic or 'development' in topic:
-                mad2_questions.append(q)
-        return mad2_questions
-    
-    return questions
+    return [q for q in questions if subject_of(q) == subject]
+
+
+def subject_questions(subject: str) -> Sequence[Dict[str, Any]]:
+    return bank.snapshot().by_subject(subject)
+
+
+def set_questions(subject: str, set_id: int) -> Sequence[Dict[str, Any]]:
+    return bank.snapshot().by_set(subject, set_id)
+
+
+def grade_submission(questions: Sequence[Dict[str, Any]], key: AnswerKey) -> Dict[str, Any]:
+    with span('grade'):
+        graded = key.grade(key.encode(request.form))
+    attempts = current_app.extensions['attempts']
+    for idx, (q, (_, result)) in enumerate(zip(questions, sorted(graded['results'].items()))):
+        attempts.record(q, result['selected'], result['is_correct'] if key.gradable(idx) else None, 'set')
+    return graded
+
+
+def grade_set_submission(subject: str, set_id: int) -> Dict[str, Any]:
+    # Shared by the BDM and MAD2 timed sets; the compiled key is cached per bank version
+    snapshot = bank.snapshot()
+    return grade_submission(snapshot.by_set(subject, set_id), snapshot.answer_key(subject, set_id))
+
+
+SET_FOCUS = {
+    ('bdm', 1): 'Economics basics, Excel functions, inventory metrics, FinTech calculations',
+    ('bdm', 2): 'Macro/micro roles, elasticity, firm ratios, industry metrics',
+    ('mad2', 1): 'JS outputs, Vue basics, async/auth, caching',
+    ('mad2', 2): 'async/await, Vuex, security, performance caching',
+}
 
 
 @bp.route('/')
+@pages.cached
 def index():
-    questions = load_questions()
     subject = request.args.get('subject', 'bdm')
-    filtered_questions = filter_by_subject(questions, subject)
-    return render_template('index.html', questions=filtered_questions, title='All Questions')
+    snapshot = bank.snapshot()
+    filtered_questions = snapshot.by_subject(subject)
+    set_subject = 'mad2' if subject == 'mad2' else 'bdm'
+    sets = snapshot.index.sets(set_subject)
+    for s in sets:
+        s['focus'] = SET_FOCUS.get((set_subject, s['id']), '')
+    return render_template('index.html', questions=filtered_questions, sets=sets, title='All Questions')
 
 
 @bp.route('/set/<int:set_id>')
+@pages.cached
 def list_set(set_id):
-    questions = load_questions()
-    if set_id == 1:
-        set_questions = questions[:23]
-        title = "Set 1: Predicted Question Paper"
-    elif set_id == 2:
-        set_questions = questions[23:46]
-        title = "Set 2: Predicted Question Paper"
-    else:
+    questions = set_questions('bdm', set_id)
+    if not questions:
         flash('Invalid set number', 'danger')
         return redirect(url_for('main.index'))
-    
-    return render_template('set_list.html', questions=set_questions, set_id=set_id, title=title)
+    title = f"Set {set_id}: Predicted Question Paper"
+
+    return render_template('set_list.html', questions=questions, set_id=set_id, title=title)
 
 
 @bp.route('/solve-set/<int:set_id>', methods=['GET', 'POST'])
+@pages.cached
 def solve_set(set_id):
-    questions = load_questions()
-    
-    if set_id == 1:
-        set_questions = questions[:23]
-        title = "Set 1: Predicted Question Paper"
-        time_limit = 60  # minutes (1 hour)
-    elif set_id == 2:
-        set_questions = questions[23:46]
-        title = "Set 2: Predicted Question Paper"
-        time_limit = 60  # minutes (1 hour)
-    else:
+    questions = set_questions('bdm', set_id)
+    if not questions:
         flash('Invalid set number', 'danger')
         return redirect(url_for('main.index'))
-    
+    title = f"Set {set_id}: Predicted Question Paper"
+    time_limit = 60  # minutes (1 hour)
+
     if request.method == 'POST':
-        score = 0
-        results = {}
-        
-        for idx, q in enumerate(set_questions, start=1):
-            selected = request.form.get(f'ans_{idx}')
-            correct_answer = q.get('answer')
-            is_correct = (selected == correct_answer) if (selected and correct_answer) else False
-            
-            if is_correct:
-                score += 1
-            
-            results[idx] = {
-                'selected': selected,
-                'is_correct': is_correct,
-                'correct': correct_answer,
-            }
-        
+        graded = grade_set_submission('bdm', set_id)
         return render_template('set_result.html', 
-                             questions=set_questions, 
-                             results=results, 
-                             score=score, 
-                             total=len(set_questions), 
+                             questions=questions, 
+                             results=graded['results'], 
+                             score=graded['score'], 
+                             total=graded['total'], 
                              set_id=set_id,
                              title=title)
     
     return render_template('solve_set.html', 
-                         questions=set_questions, 
+                         questions=questions, 
                          set_id=set_id,
                          title=title,
                          time_limit=time_limit)
 
 
-@bp.route('/practice-set/<int:set_id>')
+@bp.route('/practice-set/<int:set_id>', methods=['GET', 'POST'])
 def practice_set(set_id):
-    questions = load_questions()
-    if set_id == 1:
-        set_questions = questions[:23]
-        title = "Practice Set 1"
-    elif set_id == 2:
-        set_questions = questions[23:46]
-        title = "Practice Set 2"
-    else:
+    questions = set_questions('bdm', set_id)
+    if not questions:
         flash('Invalid set number', 'danger')
         return redirect(url_for('main.index'))
-    
-    return render_template('practice.html', 
-                         questions=set_questions,
-                         title=title,
-                         total=len(set_questions))
+    title = f"Practice Set {set_id}"
+
+    return practice_session(questions, f'bdm-set-{set_id}', title, url_for('main.index'))
 
 
 @bp.route('/question/<int:q_id>', methods=['GET', 'POST'])
+@pages.cached
 def question(q_id: int):
-    questions = load_questions()
+    questions = bank.questions()
     if q_id < 1 or q_id > len(questions):
         flash('Question not found.', 'warning')
         return redirect(url_for('main.index'))
@@ -199,6 +180,7 @@ def question(q_id: int):
         selected = request.form.get('answer')
         correct_answer = q.get('answer')
         is_correct = (selected == correct_answer) if correct_answer else None
+        current_app.extensions['attempts'].record(q, selected, is_correct, 'question')
         return render_template('result.html', question=q, q_id=q_id, selected=selected, is_correct=is_correct, total_questions=len(questions))
 
     return render_template('question.html', question=q, q_id=q_id)
@@ -220,7 +202,6 @@ def add_question():
             flash('Please fill all fields and choose a valid answer (A/B/C/D).', 'danger')
             return render_template('add.html', form=request.form)
 
-        questions = load_questions()
         new_question = {
             'text': text,
             'options': {
@@ -233,288 +214,502 @@ def add_question():
             'topic': topic,
             'subject': subject,
         }
-        questions.append(new_question)
-        save_questions(questions)
+        counts = bank.append([new_question], on_duplicate='skip')
+        if not counts['inserted']:
+            flash('This question already exists in the bank.', 'warning')
+            return render_template('add.html', form=request.form)
         flash('Question added.', 'success')
         return redirect(url_for('main.index'))
 
     return render_template('add.html')
 
 
-@bp.route('/practice', methods=['GET', 'POST'])
-def practice_all():
-    questions = load_questions()
-    subject = request.args.get('subject', 'bdm')
-    
-    # Filter questions by subject
+def _session_id() -> str:
+    # Opaque id tying this browser to its server-side practice state; it is
+    # the only practice data kept in the signed cookie.
+    sid = session.get('sid')
+    if not sid:
+        sid = session['sid'] = secrets.token_urlsafe(18)
+    return sid
+
+
+def _practice_title(subject: str) -> str:
     if subject == 'bdm':
-        questions = [q for q in questions if (q.get('subject') or 'bdm') == 'bdm']
-    elif subject == 'mad2':
-        questions = [q for q in questions if q.get('subject') == 'mad2']
-    elif subject == 'all':
-        pass  # Show all questions
-    else:
-        questions = [q for q in questions if (q.get('subject') or 'bdm') == 'bdm']
-    
-    # Use session to persist practice results across requests
-    session_key = f'practice_results_{subject}'
-    results: Dict[int, Dict[str, Any]] = session.get(session_key, {})
+        return 'Practice BDM Questions'
+    if subject == 'mad2':
+        return 'Practice MAD2 Questions'
+    if subject == 'all':
+        return 'Practice All Questions'
+    return 'Practice All'
+
+
+SET_SCOPE_RE = re.compile(r'^(bdm|mad2)-set-(\d+)$')
+# 'search-<urlsafe base64 of the query>': practice over a search result set
+SEARCH_SCOPE_RE = re.compile(r'^search-([A-Za-z0-9_-]+)$')
+
+# Largest prefetch window the practice API will return in one response
+PREFETCH_MAX = 10
+
+
+def practice_questions(scope: str) -> Optional[Sequence[Dict[str, Any]]]:
+    # Practice scopes are a subject ('bdm', 'mad2', 'all'), a set ('mad2-set-1')
+    # or a search ('search-...')
+    match = SET_SCOPE_RE.match(scope)
+    if match:
+        return set_questions(match.group(1), int(match.group(2))) or None
+    match = SEARCH_SCOPE_RE.match(scope)
+    if match:
+        query = decode_search_token(match.group(1))
+        return search_questions(query) if query else None
+    if scope in SUBJECTS or scope == 'all':
+        return subject_questions(scope)
+    # subject_questions treats unknown subjects as BDM
+    return None
+
+
+def _load_progress(scope: str, size: int):
+    store = current_app.extensions['practice_store']
+    sid = _session_id()
+    store_key = f'practice:{scope}'
+    return store, sid, store_key, PracticeProgress(size, store.get(sid, store_key))
+
+
+def _record_answer(questions: Sequence[Dict[str, Any]], position: int, selected: Optional[str], progress: PracticeProgress) -> bool:
+    if not selected or not 1 <= position <= len(questions):
+        return False
+    q = questions[position - 1]
+    correct_answer = q.get('answer')
+    is_correct = (selected == correct_answer) if correct_answer else None
+    progress.record(position - 1, selected, is_correct, topic_label(q.get('topic')))
+    current_app.extensions['attempts'].record(q, selected, is_correct, 'practice')
+    return True
+
+
+def _question_payload(q: Dict[str, Any], position: int, progress: PracticeProgress) -> Dict[str, Any]:
+    # The answer key is only included once the question has been answered
+    return {
+        'position': position,
+        'text': q.get('text'),
+        'topic': q.get('topic') or '',
+        'options': [[key, val] for key, val in (q.get('options') or {}).items()],
+        'result': progress.result(position - 1, q.get('answer')),
+    }
+
+
+def _stats_payload(progress: PracticeProgress) -> Dict[str, Any]:
+    return {
+        'answered': progress.answered,
+        'correct': progress.correct,
+        'incorrect': progress.incorrect,
+        'percentage': round(progress.percentage, 1),
+        'topics': progress.topic_breakdown(),
+    }
+
+
+def practice_session(questions: Sequence[Dict[str, Any]], scope: str, title: str, finish_url: str):
+    store, sid, store_key, progress = _load_progress(scope, len(questions))
     current_question = 1
-    
-    # Get current question from session or request
+
+    # Get current question from the query string or the submitted form
     if request.method == 'GET':
-        current_question = int(request.args.get('q', 1))
+        current_question = request.args.get('q', 1, type=int)
     elif request.method == 'POST':
-        current_question = int(request.form.get('question_number', 1))
+        current_question = request.form.get('question_number', 1, type=int)
         action = request.form.get('action', 'submit')
-        
+
         if action == 'submit':
             # Handle answer submission
-            selected = request.form.get('answer')
-            if selected and 1 <= current_question <= len(questions):
-                q = questions[current_question - 1]
-                correct_answer = q.get('answer')
-                is_correct = (selected == correct_answer) if correct_answer else None
-                
-                results[str(current_question)] = {
-                    'selected_answer': selected,
-                    'is_correct': bool(is_correct) if is_correct is not None else None,
-                    'correct': correct_answer,
-                }
-                session[session_key] = results
-        
+            if _record_answer(questions, current_question, request.form.get('answer'), progress):
+                store.set(sid, store_key, progress.to_bytes())
+
         elif action == 'next':
             current_question = min(current_question + 1, len(questions))
         elif action == 'previous':
             current_question = max(current_question - 1, 1)
         elif action == 'finish':
             flash('Practice session completed!', 'success')
-            session.pop(session_key, None)
-            return redirect(url_for('main.index'))
-    
-    # Calculate statistics
-    answered_questions = len([r for r in results.values() if r and r.get('selected_answer')])
-    correct_answers = len([r for r in results.values() if r and r.get('is_correct')])
-    incorrect_answers = answered_questions - correct_answers
-    correct_percentage = (correct_answers / answered_questions * 100) if answered_questions > 0 else 0
-    
-    title = 'Practice All'
-    if subject == 'bdm':
-        title = 'Practice BDM Questions'
-    elif subject == 'mad2':
-        title = 'Practice MAD2 Questions'
-    elif subject == 'all':
-        title = 'Practice All Questions'
-    
-    # Cast keys to int for template access consistency
-    normalized_results: Dict[int, Dict[str, Any]] = {int(k): v for k, v in results.items()}
+            store.delete(sid, store_key)
+            return redirect(finish_url)
+
+    current_question = max(1, min(current_question, len(questions)))
+    q = questions[current_question - 1] if questions else None
+    result = progress.result(current_question - 1, q.get('answer')) if q else None
 
     return render_template('practice.html', 
-                         questions=questions, 
-                         results=normalized_results, 
+                         q=q,
+                         q_index=current_question,
+                         result=result,
                          current_question=current_question,
                          total=len(questions), 
                          title=title,
-                         answered_questions=answered_questions,
-                         correct_answers=correct_answers,
-                         incorrect_answers=incorrect_answers,
-                         correct_percentage=correct_percentage)
+                         api_url=url_for('main.practice_api', scope=scope),
+                         answer_url=url_for('main.practice_api_answer', scope=scope),
+                         answered_questions=progress.answered,
+                         correct_answers=progress.correct,
+                         incorrect_answers=progress.incorrect,
+                         correct_percentage=progress.percentage,
+                         topic_stats=progress.topic_breakdown())
+
+
+@bp.route('/api/practice/<scope>')
+def practice_api(scope):
+    # One question (plus an optional prefetch window) for client-side paging
+    questions = practice_questions(scope)
+    if questions is None:
+        return jsonify(error='Unknown practice scope.'), 404
+    _, _, _, progress = _load_progress(scope, len(questions))
+    total = len(questions)
+    position = max(1, min(request.args.get('q', 1, type=int), total))
+    window = max(1, min(request.args.get('prefetch', 1, type=int), PREFETCH_MAX))
+    items = [
+        _question_payload(questions[pos - 1], pos, progress)
+        for pos in range(position, min(position + window, total + 1))
+    ]
+    return jsonify(total=total, questions=items, stats=_stats_payload(progress))
+
+
+@bp.route('/api/practice/<scope>/answer', methods=['POST'])
+def practice_api_answer(scope):
+    questions = practice_questions(scope)
+    if questions is None:
+        return jsonify(error='Unknown practice scope.'), 404
+    data = request.get_json(silent=True) or request.form
+    # A JSON body may be any value: only an object with a string answer is usable
+    answer = data.get('answer') if isinstance(data, Mapping) else None
+    if not isinstance(answer, str):
+        return jsonify(error='Choose an answer for a valid question.'), 400
+    try:
+        position = int(data.get('question_number', 0))
+    except (TypeError, ValueError):
+        position = 0
+    store, sid, store_key, progress = _load_progress(scope, len(questions))
+    if not _record_answer(questions, position, answer, progress):
+        return jsonify(error='Choose an answer for a valid question.'), 400
+    store.set(sid, store_key, progress.to_bytes())
+    return jsonify(question=_question_payload(questions[position - 1], position, progress), stats=_stats_payload(progress))
+
+
+@bp.route('/practice', methods=['GET', 'POST'])
+def practice_all():
+    subject = request.args.get('subject', 'bdm')
+    return practice_session(subject_questions(subject), normalize_subject(subject), _practice_title(subject), url_for('main.index'))
 
 
 @bp.route('/practice/<subject>', methods=['GET', 'POST'])
 def practice_subject(subject):
-    questions = load_questions()
-    
-    # Filter questions by subject
-    if subject == 'bdm':
-        questions = [q for q in questions if (q.get('subject') or 'bdm') == 'bdm']
-    elif subject == 'mad2':
-        questions = [q for q in questions if q.get('subject') == 'mad2']
-    elif subject == 'all':
-        pass  # Show all questions
-    else:
-        questions = [q for q in questions if (q.get('subject') or 'bdm') == 'bdm']
-    
-    session_key = f'practice_results_{subject}'
-    results: Dict[int, Dict[str, Any]] = session.get(session_key, {})
-    current_question = 1
-    
-    # Get current question from session or request
-    if request.method == 'GET':
-        current_question = int(request.args.get('q', 1))
-    elif request.method == 'POST':
-        current_question = int(request.form.get('question_number', 1))
-        action = request.form.get('action', 'submit')
-        
-        if action == 'submit':
-            # Handle answer submission
-            selected = request.form.get('answer')
-            if selected and 1 <= current_question <= len(questions):
-                q = questions[current_question - 1]
-                correct_answer = q.get('answer')
-                is_correct = (selected == correct_answer) if correct_answer else None
-                
-                results[str(current_question)] = {
-                    'selected_answer': selected,
-                    'is_correct': bool(is_correct) if is_correct is not None else None,
-                    'correct': correct_answer,
-                }
-                session[session_key] = results
-        
-        elif action == 'next':
-            current_question = min(current_question + 1, len(questions))
-        elif action == 'previous':
-            current_question = max(current_question - 1, 1)
-        elif action == 'finish':
-            flash('Practice session completed!', 'success')
-            session.pop(session_key, None)
-            return redirect(url_for('main.index'))
-    
-    # Calculate statistics
-    answered_questions = len([r for r in results.values() if r and r.get('selected_answer')])
-    correct_answers = len([r for r in results.values() if r and r.get('is_correct')])
-    incorrect_answers = answered_questions - correct_answers
-    correct_percentage = (correct_answers / answered_questions * 100) if answered_questions > 0 else 0
-    
-    title = 'Practice All'
-    if subject == 'bdm':
-        title = 'Practice BDM Questions'
-    elif subject == 'mad2':
-        title = 'Practice MAD2 Questions'
-    elif subject == 'all':
-        title = 'Practice All Questions'
+    return practice_session(subject_questions(subject), normalize_subject(subject), _practice_title(subject), url_for('main.index'))
 
-    normalized_results: Dict[int, Dict[str, Any]] = {int(k): v for k, v in results.items()}
-    
-    return render_template('practice.html', 
-                         questions=questions, 
-                         results=normalized_results, 
-                         current_question=current_question,
-                         total=len(questions), 
-                         title=title,
-                         answered_questions=answered_questions,
-                         correct_answers=correct_answers,
-                         incorrect_answers=incorrect_answers,
-                         correct_percentage=correct_percentage)
+
+def topic_order(subject: str) -> Dict[str, Sequence[int]]:
+    # Positions within the subject's question list grouped by topic label,
+    # built once per bank version
+    snapshot = bank.snapshot()
+
+    def build() -> Dict[str, Sequence[int]]:
+        groups: Dict[str, List[int]] = {}
+        for pos, q in enumerate(snapshot.by_subject(subject)):
+            groups.setdefault(topic_label(q.get('topic')), []).append(pos)
+        return {topic: tuple(positions) for topic, positions in groups.items()}
+
+    return snapshot.derived(('topic_order', subject), build)
+
+
+@bp.route('/practice-adaptive/<subject>', methods=['GET', 'POST'])
+def practice_adaptive(subject):
+    # Spaced-repetition practice: the scheduler picks each next question from
+    # this learner's history (see scheduler.py)
+    subject = normalize_subject(subject)
+    questions = subject_questions(subject)
+    store = current_app.extensions['practice_store']
+    sid = _session_id()
+    store_key = f'adaptive:{subject}'
+    data = store.get(sid, store_key)
+    schedule = schedules.checkout(sid, store_key, data)
+    now = int(time.time())
+    title = f'Adaptive {_practice_title(subject)}'
+
+    if request.method == 'POST':
+        if request.form.get('action') == 'finish':
+            flash('Adaptive practice session reset.', 'success')
+            store.delete(sid, store_key)
+            return redirect(url_for('main.index', subject=subject))
+        position = request.form.get('question_number', 0, type=int)
+        selected = request.form.get('answer')
+        if not selected or not 1 <= position <= len(questions):
+            schedules.checkin(sid, store_key, data, schedule)
+            flash('Choose an answer.', 'warning')
+            return redirect(url_for('main.practice_adaptive', subject=subject))
+        q = questions[position - 1]
+        correct_answer = q.get('answer')
+        is_correct = (selected == correct_answer) if correct_answer else None
+        schedule.record(position - 1, topic_label(q.get('topic')), is_correct, now)
+        data = schedule.to_bytes()
+        store.set(sid, store_key, data)
+        schedules.checkin(sid, store_key, data, schedule)
+        current_app.extensions['attempts'].record(q, selected, is_correct, 'practice')
+        result = {'selected_answer': selected, 'is_correct': is_correct, 'correct': correct_answer}
+        return render_template('adaptive.html', q=q, q_index=position, result=result, title=title,
+                               subject=subject, total=len(questions), stats=schedule.summary(now))
+
+    pos = schedule.next(topic_order(subject), now)
+    schedules.checkin(sid, store_key, data, schedule)
+    q = questions[pos] if pos is not None else None
+    return render_template('adaptive.html', q=q, q_index=pos + 1 if pos is not None else None, result=None,
+                           title=title, subject=subject, total=len(questions), stats=schedule.summary(now))
+
+
+@bp.route('/paper/<subject>', methods=['GET', 'POST'])
+def paper(subject):
+    # A fresh timed paper drawn from the subject's bank with per-topic quotas.
+    # The seed in the URL makes it reproducible, so grading rebuilds the same
+    # paper instead of storing it.
+    subject = normalize_subject(subject)
+    size = max(1, min(request.args.get('n', PAPER_SIZE, type=int), PAPER_MAX))
+    quota_args = request.args.getlist('quota')
+    seed = request.args.get('seed', type=int)
+    if seed is None:
+        return redirect(url_for('main.paper', subject=subject, n=size, seed=new_seed(), quota=quota_args))
+    paper_url = url_for('main.paper', subject=subject, n=size, seed=seed, quota=quota_args)
+
+    pool = subject_questions(subject)
+    positions = generate_paper(topic_order(subject), size, seed, parse_quotas(quota_args))
+    questions = [pool[pos] for pos in positions]
+    if not questions:
+        flash('No questions match this paper.', 'warning')
+        return redirect(url_for('main.index', subject=subject))
+    title = f'{subject.upper()} Practice Paper #{seed}'
+    checksum = paper_checksum(questions)
+
+    if request.method == 'POST':
+        if request.form.get('paper') != checksum:
+            flash('The question bank changed after this paper was generated. Here is the updated paper.', 'warning')
+            return redirect(paper_url)
+        graded = grade_submission(questions, AnswerKey(questions))
+        return render_template('set_result.html', questions=questions, results=graded['results'], score=graded['score'],
+                               total=graded['total'], set_id=None, title=title, retake_url=paper_url,
+                               new_url=url_for('main.paper', subject=subject, n=size, quota=quota_args))
+
+    time_limit = math.ceil(len(questions) * MINUTES_PER_QUESTION)
+    return render_template('solve_set.html', questions=questions, set_id=None, title=title, time_limit=time_limit, paper=checksum)
 
 
 @bp.route('/import', methods=['GET', 'POST'])
 def import_questions():
     if request.method == 'POST':
-        raw = request.form.get('payload', '').strip()
-        if not raw:
-            flash('Paste JSON payload.', 'warning')
-            return render_template('import.html')
+        upload = request.files.get('file')
+        raw = ''
+        if upload and upload.filename:
+            # Uploaded files are parsed straight off the (spooled) request stream
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8')
+        else:
+            raw = request.form.get('payload', '').strip()
+            if not raw:
+                flash('Paste a JSON or Question Bank text payload, or choose a file.', 'warning')
+                return render_template('import.html')
+            stream = io.StringIO(raw)
+
+        on_duplicate = request.form.get('on_duplicate', 'skip')
+        if on_duplicate not in DUPLICATE_MODES:
+            on_duplicate = 'skip'
+        near = bool(request.form.get('near_duplicates'))
+
+        total_before = len(bank.questions())
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError as e:
+            # JSON payloads and plain-text Question Bank dumps are both accepted
+            report = import_auto(stream, bank, on_duplicate=on_duplicate, near=near)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
             flash(f'Invalid JSON: {e}', 'danger')
             return render_template('import.html', payload=raw)
 
-        incoming = []
-        if isinstance(data, dict) and 'questions' in data and isinstance(data['questions'], list):
-            incoming = data['questions']
-        elif isinstance(data, list):
-            incoming = data
-        else:
-            flash('JSON must be a list of questions or an object with a questions array.', 'danger')
-            return render_template('import.html', payload=raw)
-
-        
-        normalized: List[Dict[str, Any]] = []
-        for item in incoming:
-            if not isinstance(item, dict):
-                continue
-            text = str(item.get('text', '')).strip()
-            options = item.get('options')
-            answer = (item.get('answer') or '').strip().upper() or None
-            topic = str(item.get('topic', '') or item.get('set', '') or '').strip()
-            subject = str(item.get('subject', 'bdm') or 'bdm').strip()
-            if not text or not isinstance(options, dict):
-                continue
-            
-            fixed_options: Dict[str, str] = {}
-            for key in ['A', 'B', 'C', 'D']:
-                val = options.get(key)
-                if val is not None:
-                    fixed_options[key] = str(val)
-            if len(fixed_options) < 2:
-                continue
-            if answer and answer not in fixed_options:
-                # ignore invalid answer
-                answer = None
-            normalized.append({'text': text, 'options': fixed_options, 'answer': answer, 'topic': topic, 'subject': subject})
-
-        if not normalized:
+        if not report.accepted:
             flash('No valid questions found to import.', 'warning')
             return render_template('import.html', payload=raw)
 
-        existing = load_questions()
-        total_before = len(existing)
-        existing.extend(normalized)
-        save_questions(existing)
-        flash(f'Imported {len(normalized)} questions. Total is now {len(existing)} (was {total_before}).', 'success')
+        flash(
+            f'Imported {report.inserted} questions ({report.rejected} rejected, '
+            f'{report.duplicates} duplicates skipped, {report.updated} updated, '
+            f'{report.rate:.0f}/s). Total is now {len(bank.questions())} (was {total_before}).',
+            'success',
+        )
         return redirect(url_for('main.index'))
 
     return render_template('import.html')
 
 
 @bp.route('/mad2/set/<int:set_id>')
+@pages.cached
 def mad2_list_set(set_id):
-    # Load only MAD2 questions
-    all_questions = load_questions()
-    mad2_questions = [q for q in all_questions if (q.get('subject') or '').lower() == 'mad2']
-
-    # Partition into sets of 25
-    start = 0 if set_id == 1 else 25 if set_id == 2 else None
-    if start is None or start >= len(mad2_questions):
+    questions = set_questions('mad2', set_id)
+    if not questions:
         flash('Invalid MAD2 set number', 'danger')
         return redirect(url_for('main.index', subject='mad2'))
-    end = min(start + 25, len(mad2_questions))
-    set_questions = mad2_questions[start:end]
     title = f"MAD2 Set {set_id}: Predicted Question Paper"
-    return render_template('set_list.html', questions=set_questions, set_id=set_id, title=title)
+    return render_template('set_list.html', questions=questions, set_id=set_id, title=title)
 
 
 @bp.route('/mad2/solve-set/<int:set_id>', methods=['GET', 'POST'])
+@pages.cached
 def mad2_solve_set(set_id):
-    all_questions = load_questions()
-    mad2_questions = [q for q in all_questions if (q.get('subject') or '').lower() == 'mad2']
-    start = 0 if set_id == 1 else 25 if set_id == 2 else None
-    if start is None or start >= len(mad2_questions):
+    questions = set_questions('mad2', set_id)
+    if not questions:
         flash('Invalid MAD2 set number', 'danger')
         return redirect(url_for('main.index', subject='mad2'))
-    end = min(start + 25, len(mad2_questions))
-    set_questions = mad2_questions[start:end]
     title = f"MAD2 Set {set_id}: Predicted Question Paper"
     time_limit = 60
 
     if request.method == 'POST':
-        score = 0
-        results: Dict[int, Dict[str, Any]] = {}
-        for idx, q in enumerate(set_questions, start=1):
-            selected = request.form.get(f'ans_{idx}')
-            correct_answer = q.get('answer')
-            is_correct = (selected == correct_answer) if (selected and correct_answer) else False
-            if is_correct:
-                score += 1
-            results[idx] = {'selected': selected, 'is_correct': is_correct, 'correct': correct_answer}
-        return render_template('set_result.html', questions=set_questions, results=results, score=score, total=len(set_questions), set_id=set_id, title=title)
+        graded = grade_set_submission('mad2', set_id)
+        return render_template('set_result.html', questions=questions, results=graded['results'], score=graded['score'], total=graded['total'], set_id=set_id, title=title,
+                               retake_url=url_for('main.mad2_solve_set', set_id=set_id), practice_url=url_for('main.mad2_practice_set', set_id=set_id))
 
-    return render_template('solve_set.html', questions=set_questions, set_id=set_id, title=title, time_limit=time_limit)
+    return render_template('solve_set.html', questions=questions, set_id=set_id, title=title, time_limit=time_limit)
 
 
-@bp.route('/mad2/practice-set/<int:set_id>')
+@bp.route('/mad2/practice-set/<int:set_id>', methods=['GET', 'POST'])
 def mad2_practice_set(set_id):
-    all_questions = load_questions()
-    mad2_questions = [q for q in all_questions if (q.get('subject') or '').lower() == 'mad2']
-    start = 0 if set_id == 1 else 25 if set_id == 2 else None
-    if start is None or start >= len(mad2_questions):
+    questions = set_questions('mad2', set_id)
+    if not questions:
         flash('Invalid MAD2 set number', 'danger')
         return redirect(url_for('main.index', subject='mad2'))
-    end = min(start + 25, len(mad2_questions))
-    set_questions = mad2_questions[start:end]
     title = f"MAD2 Practice Set {set_id}"
-    return render_template('practice.html', questions=set_questions, title=title, total=len(set_questions))
+    return practice_session(questions, f'mad2-set-{set_id}', title, url_for('main.index', subject='mad2'))
 
 
+SEARCH_PAGE_SIZE = 20
+SEARCH_PAGE_MAX = 100
+# Most questions a practice session started from a search will hold
+SEARCH_PRACTICE_MAX = 200
+SEARCH_QUERY_MAX = 200
+
+
+def encode_search_token(query: str) -> str:
+    return base64.urlsafe_b64encode(query.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_search_token(token: str) -> Optional[str]:
+    try:
+        return base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')[:SEARCH_QUERY_MAX]
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def run_search(query: str, subject: Optional[str] = None, page: int = 1, per_page: int = SEARCH_PAGE_SIZE) -> Dict[str, Any]:
+    snapshot = bank.snapshot()
+    with span('filter'):
+        total, hits = searcher.sync(snapshot).search(query, subject=subject, offset=(page - 1) * per_page, limit=per_page)
+    return {
+        'query': query,
+        'subject': subject or 'all',
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'results': [{'id': pos + 1, 'question': snapshot.questions[pos], 'score': round(score, 3)} for pos, score in hits],
+    }
+
+
+def search_questions(query: str) -> Optional[Sequence[Dict[str, Any]]]:
+    snapshot = bank.snapshot()
+    with span('filter'):
+        _, hits = searcher.sync(snapshot).search(query, limit=SEARCH_PRACTICE_MAX)
+    return snapshot.select([pos for pos, _ in hits]) or None
+
+
+def _search_args():
+    query = request.args.get('q', '').strip()[:SEARCH_QUERY_MAX]
+    subject = request.args.get('subject', 'all')
+    subject = normalize_subject(subject) if subject in ('bdm', 'mad2') else None
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(request.args.get('per_page', SEARCH_PAGE_SIZE, type=int), SEARCH_PAGE_MAX))
+    return query, subject, page, per_page
+
+
+@bp.route('/search')
+def search():
+    query, subject, page, per_page = _search_args()
+    found = run_search(query, subject, page, per_page) if query else None
+    practice_url = url_for('main.practice_search', token=encode_search_token(query)) if found and found['total'] else None
+    return render_template('search.html', query=query, subject=subject or 'all', found=found, practice_url=practice_url)
+
+
+@bp.route('/api/search')
+def search_api():
+    query, subject, page, per_page = _search_args()
+    if not query:
+        return jsonify(error='Missing search query.'), 400
+    found = run_search(query, subject, page, per_page)
+    for item in found['results']:
+        q = item.pop('question')
+        item.update(text=q.get('text'), topic=q.get('topic') or '', subject=q.get('subject'))
+    found['practice_url'] = url_for('main.practice_search', token=encode_search_token(query)) if found['total'] else None
+    return jsonify(found)
+
+
+@bp.route('/practice-search/<token>', methods=['GET', 'POST'])
+def practice_search(token):
+    query = decode_search_token(token)
+    questions = search_questions(query) if query else None
+    if not questions:
+        flash('No questions match that search.', 'warning')
+        return redirect(url_for('main.search', q=query or ''))
+    return practice_session(questions, f'search-{token}', f'Practice: "{query}"', url_for('main.search', q=query))
+
+
+ANALYTICS_LIMIT = 50
+
+
+@bp.route('/api/analytics')
+def analytics_api():
+    # Aggregates are folded in by the attempt writer thread; reading them
+    # costs a stat() of the attempt log, plus reading any records other
+    # workers appended since
+    attempts = current_app.extensions['attempts']
+    snapshot = bank.snapshot()
+    keys = snapshot.derived('question_keys', lambda: {question_key(q): (pos + 1, q) for pos, q in enumerate(snapshot.questions)})
+    limit = max(1, min(request.args.get('limit', ANALYTICS_LIMIT, type=int), 1000))
+    return jsonify(
+        summary=attempts.summary(),
+        questions=attempts.question_stats(keys, limit=limit),
+        topics=attempts.topic_stats(),
+    )
+
+
+EXPORT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+@bp.route('/export/<any(questions, results):kind>.<any(jsonl, csv):fmt>')
+def export(kind: str, fmt: str):
+    # Streams one row per question (or per attempted question, for results)
+    # as it is encoded; nothing is assembled in memory, and the snapshot
+    # taken here keeps the export consistent if the bank changes meanwhile.
+    # Filters: ?subject=bdm|mad2|all, ?set=<n> (BDM unless subject is
+    # given), ?topic=<label>.
+    snapshot = bank.snapshot()
+    subject = request.args.get('subject')
+    set_id = request.args.get('set', type=int)
+    positions = export_positions(snapshot, subject, set_id, request.args.get('topic'))
+    if kind == 'questions':
+        rows = question_rows(snapshot, positions)
+        columns = QUESTION_COLUMNS
+        if fmt == 'csv':
+            rows = map(question_csv_row, rows)
+    else:
+        attempts = current_app.extensions['attempts']
+        attempts.refresh()
+        rows = result_rows(snapshot, positions, attempts.question_counts)
+        columns = RESULT_COLUMNS
+    chunks = jsonl_chunks(rows) if fmt == 'jsonl' else csv_chunks(rows, columns)
+
+    compress = request.accept_encodings['gzip'] > 0
+    response = Response(encode_chunks(chunks, compress), mimetype=EXPORT_TYPES[fmt])
+    name = '-'.join(str(part) for part in (kind, subject, set_id and f'set{set_id}') if part)
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@bp.route('/bank/stats')
+def bank_stats():
+    return jsonify(dict(bank.stats(), pages=pages.stats(), search=searcher.stats()))
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import heapq
+import json
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+# Review intervals in seconds: a first correct answer comes back after
+# FIRST_INTERVAL, each further correct answer multiplies the gap by EASE,
+# and a wrong answer brings the question back after RETRY_INTERVAL.
+FIRST_INTERVAL = 10 * 60
+RETRY_INTERVAL = 60
+EASE = 2.5
+MAX_INTERVAL = 30 * 24 * 3600
+
+# Share of its interval by which a question is brought forward, at a 100%
+# error rate for the question itself and for its topic
+ERROR_PULL = 0.5
+TOPIC_PULL = 0.25
+
+# Serialized layout: MAGIC, record count, one RECORD per answered question
+# (position, due, priority, interval, attempts, errors), then per-topic
+# state as JSON.
+MAGIC = b'S\x01'
+HEADER = struct.Struct('<I')
+RECORD = struct.Struct('<IIIIBB')
+
+
+def _weakness(attempts: int, errors: int) -> float:
+    # Smoothed error rate, so a topic with one wrong answer isn't 100% weak
+    return (errors + 1) / (attempts + 2)
+
+
+class AdaptiveSchedule:
+    # Spaced-repetition / weakness-first order for one learner and scope.
+    #
+    # Answered questions sit in a min-heap keyed by due time pulled forward
+    # by their own and their topic's error rate; re-answering pushes a new
+    # entry and the old one is dropped lazily when it reaches the top. A
+    # question that is due wins; otherwise the next unseen question comes
+    # from the weakest topic that still has some. Picking the next question
+    # is O(log n) heap work plus a scan over topics.
+    #
+    # Decoding the stored bytes is O(n) (unpack every record, heapify), so
+    # routes keep decoded schedules in a ScheduleCache. The records are also
+    # kept packed, each answer re-packing only its own slot, so to_bytes is
+    # one copy rather than a pack per record.
+    __slots__ = ('records', 'topics', '_heap', '_packed', '_slots')
+
+    def __init__(self, data: Optional[bytes] = None):
+        # position -> [due, priority, interval, attempts, errors]
+        self.records: Dict[int, List[int]] = {}
+        # topic label -> [cursor into its unseen positions, attempts, errors]
+        self.topics: Dict[str, List[int]] = {}
+        # RECORD-packed records and each position's slot in them
+        self._packed = bytearray()
+        self._slots: Dict[int, int] = {}
+        if data and data[:len(MAGIC)] == MAGIC:
+            self._decode(data)
+        self._heap: List[Tuple[int, int, int]] = [(rec[1], pos, rec[0]) for pos, rec in self.records.items()]
+        heapq.heapify(self._heap)
+
+    def _decode(self, data: bytes) -> None:
+        offset = len(MAGIC)
+        (count,) = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        end = offset + count * RECORD.size
+        self._packed = bytearray(data[offset:end])
+        for slot, (pos, *rec) in enumerate(RECORD.iter_unpack(self._packed)):
+            self.records[pos] = rec
+            self._slots[pos] = slot
+        if end < len(data):
+            self.topics = json.loads(data[end:].decode('utf-8'))
+
+    def to_bytes(self) -> bytes:
+        topics = json.dumps(self.topics, separators=(',', ':')).encode('utf-8') if self.topics else b''
+        return MAGIC + HEADER.pack(len(self._slots)) + self._packed + topics
+
+    def _priority(self, rec: List[int], topic: str) -> int:
+        due, _, interval, attempts, errors = rec
+        counts = self.topics[topic]
+        pull = (errors / attempts if attempts else 0.0) * ERROR_PULL + _weakness(counts[1], counts[2]) * TOPIC_PULL
+        return due - int(interval * pull)
+
+    def _top(self) -> Optional[Tuple[int, int, int]]:
+        heap = self._heap
+        while heap:
+            priority, pos, due = heap[0]
+            rec = self.records.get(pos)
+            if rec is not None and rec[0] == due and rec[1] == priority:
+                return heap[0]
+            heapq.heappop(heap)  # superseded by a later answer
+        return None
+
+    def _next_new(self, topic_order: Mapping[str, Sequence[int]]) -> Optional[int]:
+        best: Optional[Tuple[float, int, str]] = None
+        for topic, positions in topic_order.items():
+            counts = self.topics.setdefault(topic, [0, 0, 0])
+            cursor = counts[0]
+            while cursor < len(positions) and positions[cursor] in self.records:
+                cursor += 1
+            counts[0] = cursor
+            if cursor >= len(positions):
+                continue
+            # Weakest topic first, then the earliest question in bank order
+            candidate = (-_weakness(counts[1], counts[2]), positions[cursor], topic)
+            if best is None or candidate < best:
+                best = candidate
+        return best[1] if best is not None else None
+
+    def next(self, topic_order: Mapping[str, Sequence[int]], now: int) -> Optional[int]:
+        # Position of the question to ask next: a due review, else a new
+        # question, else the review that comes due soonest
+        top = self._top()
+        if top is not None and top[0] <= now:
+            return top[1]
+        new = self._next_new(topic_order)
+        if new is not None:
+            return new
+        return top[1] if top is not None else None
+
+    def record(self, pos: int, topic: str, is_correct: Optional[bool], now: int) -> None:
+        rec = self.records.get(pos)
+        if rec is None:
+            rec = self.records[pos] = [0, 0, 0, 0, 0]
+        wrong = is_correct is False
+        if rec[3] == 255:
+            # Keep the one-byte counters in range while preserving the error rate
+            rec[3], rec[4] = 128, rec[4] // 2
+        rec[3] += 1
+        if wrong:
+            rec[4] += 1
+            rec[2] = RETRY_INTERVAL
+        else:
+            rec[2] = min(int(rec[2] * EASE) if rec[2] >= FIRST_INTERVAL else FIRST_INTERVAL, MAX_INTERVAL)
+        rec[0] = now + rec[2]
+
+        counts = self.topics.setdefault(topic, [0, 0, 0])
+        counts[1] += 1
+        if wrong:
+            counts[2] += 1
+        rec[1] = self._priority(rec, topic)
+        heapq.heappush(self._heap, (rec[1], pos, rec[0]))
+
+        slot = self._slots.get(pos)
+        if slot is None:
+            slot = self._slots[pos] = len(self._slots)
+            self._packed.extend(bytes(RECORD.size))
+        RECORD.pack_into(self._packed, slot * RECORD.size, pos, *rec)
+
+    def summary(self, now: int) -> Dict[str, Any]:
+        attempts = sum(counts[1] for counts in self.topics.values())
+        errors = sum(counts[2] for counts in self.topics.values())
+        weakest = sorted(
+            (topic for topic, counts in self.topics.items() if counts[1]),
+            key=lambda topic: -_weakness(self.topics[topic][1], self.topics[topic][2]),
+        )
+        return {
+            'seen': len(self.records),
+            'due': sum(1 for rec in self.records.values() if rec[0] <= now),
+            'attempts': attempts,
+            'accuracy': round((attempts - errors) / attempts * 100, 1) if attempts else 0,
+            'weakest': [
+                {'topic': topic, 'attempts': self.topics[topic][1], 'errors': self.topics[topic][2]}
+                for topic in weakest[:3]
+            ],
+        }
+
+
+class ScheduleCache:
+    # Decoded schedules per (session id, key), LRU-bounded, so a request
+    # costs O(log n) heap work instead of an O(n) decode. An entry is only
+    # reused while the session store still holds exactly the bytes it was
+    # checked in with; if another worker answered (or the session was reset)
+    # the bytes differ and the schedule is decoded afresh. A schedule is
+    # taken out of the cache while a request uses it, so two concurrent
+    # requests for one learner never share (and race on) one object.
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: 'OrderedDict[Tuple[str, str], Tuple[Optional[bytes], AdaptiveSchedule]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def checkout(self, sid: str, key: str, data: Optional[bytes]) -> AdaptiveSchedule:
+        with self._lock:
+            entry = self._data.pop((sid, key), None)
+            if entry is not None and entry[0] == data:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return AdaptiveSchedule(data)
+
+    def checkin(self, sid: str, key: str, data: Optional[bytes], schedule: AdaptiveSchedule) -> None:
+        # `data` is what the store holds for this schedule now
+        with self._lock:
+            self._data[(sid, key)] = (data, schedule)
+            self._data.move_to_end((sid, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
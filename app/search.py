@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Matches in the topic count most, then the question text, then the options
+FIELD_WEIGHTS = (('topic', 3.0), ('text', 2.0))
+OPTION_WEIGHT = 1.0
+
+# Prefix matches score below whole-word matches, and one query term expands
+# to at most PREFIX_MAX vocabulary words
+PREFIX_FACTOR = 0.7
+PREFIX_MAX = 64
+PREFIX_MIN = 2
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from in is it of on or that the this to was what which with'.split()
+)
+
+# Once more than half the indexed documents are gone from the bank, rebuild
+# instead of carrying the dead postings around
+REBUILD_RATIO = 0.5
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def query_terms(query: str) -> List[str]:
+    terms = tokenize(query)
+    kept = [t for t in terms if t not in STOPWORDS]
+    # A query made only of stopwords still searches for them
+    return list(dict.fromkeys(kept or terms))
+
+
+def _doc_key(q: Mapping[str, Any]) -> Tuple[Any, ...]:
+    options = q.get('options') or {}
+    return (q.get('subject'), q.get('text'), q.get('topic'), tuple(options.items()))
+
+
+class _Postings:
+    # Doc ids in ascending order (ids are handed out in increasing order, so
+    # appending keeps them sorted) with a parallel field-weighted frequency
+    __slots__ = ('ids', 'weights')
+
+    def __init__(self) -> None:
+        self.ids = array('I')
+        self.weights = array('f')
+
+    def weight(self, doc: int) -> float:
+        i = bisect_left(self.ids, doc)
+        if i < len(self.ids) and self.ids[i] == doc:
+            return self.weights[i]
+        return 0.0
+
+
+class SearchIndex:
+    # Inverted index over question text, options and topic. It follows the
+    # bank across versions: sync() maps each question of a new snapshot to an
+    # already-indexed document by content, so only questions that were added
+    # since the last version get tokenized. Documents that disappeared stay in
+    # the postings but map to no position, and are skipped at query time.
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.version: Optional[int] = None
+        self._questions: Sequence[Mapping[str, Any]] = ()
+        self._keys: Dict[Tuple[Any, ...], int] = {}
+        self._positions = array('i')  # doc id -> position in the snapshot, -1 if gone
+        self._docs = 0
+        self._live = 0
+        self._postings: Dict[str, _Postings] = {}
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+
+    def sync(self, snapshot: Any) -> 'SearchIndex':
+        if snapshot.version == self.version:
+            return self
+        with self._lock:
+            if snapshot.version == self.version:
+                return self
+            questions = snapshot.questions
+            if self._docs and self._docs - len(questions) > REBUILD_RATIO * self._docs:
+                self._reset()
+            positions = array('i', [-1]) * self._docs
+            for pos, q in enumerate(questions):
+                key = _doc_key(q)
+                doc = self._keys.get(key)
+                if doc is None or positions[doc] != -1:
+                    # New question (or a second copy of one already placed)
+                    doc = self._add(q)
+                    if key not in self._keys:
+                        self._keys[key] = doc
+                    positions.append(pos)
+                else:
+                    positions[doc] = pos
+            self._positions = positions
+            self._live = len(questions)
+            self._questions = questions
+            self.version = snapshot.version
+        return self
+
+    def _add(self, q: Mapping[str, Any]) -> int:
+        doc = self._docs
+        self._docs += 1
+        weights: Dict[str, float] = dict.fromkeys(tokenize(' '.join((q.get('options') or {}).values())), OPTION_WEIGHT)
+        get = weights.get
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(q.get(field)):
+                weights[token] = get(token, 0.0) + weight
+        all_postings = self._postings
+        for token, weight in weights.items():
+            postings = all_postings.get(token)
+            if postings is None:
+                postings = all_postings[token] = _Postings()
+                self._vocab_dirty = True
+            postings.ids.append(doc)
+            postings.weights.append(weight)
+        return doc
+
+    def _expand(self, term: str) -> List[Tuple[_Postings, float]]:
+        # The word itself plus vocabulary words it is a prefix of
+        matches: List[Tuple[_Postings, float]] = []
+        exact = self._postings.get(term)
+        if exact is not None:
+            matches.append((exact, 1.0))
+        if len(term) < PREFIX_MIN:
+            return matches
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        vocab = self._vocab
+        i = bisect_left(vocab, term)
+        while i < len(vocab) and len(matches) < PREFIX_MAX and vocab[i].startswith(term):
+            if vocab[i] != term:
+                matches.append((self._postings[vocab[i]], PREFIX_FACTOR))
+            i += 1
+        return matches
+
+    def search(self, query: str, subject: Optional[str] = None, offset: int = 0, limit: int = 20) -> Tuple[int, List[Tuple[int, float]]]:
+        # (total matches, [(position, score), ...] for the requested page).
+        # Every term must match (as a word or word prefix); scores add up
+        # field-weighted frequency times IDF per term.
+        terms = query_terms(query)
+        if not terms:
+            return 0, []
+        with self._lock:
+            expanded = [self._expand(t) for t in terms]
+            # A sync() after this point appends new doc ids to the postings
+            # in place but swaps in a new positions array, so ids past the
+            # end of this one belong to a newer snapshot and are skipped
+            positions = self._positions
+            questions = self._questions
+            live = max(1, self._live)
+        if not all(expanded):
+            return 0, []
+
+        weighted = []
+        for matches in expanded:
+            df = sum(len(p.ids) for p, _ in matches)
+            weighted.append((matches, math.log(1.0 + live / max(1, df))))
+        # Drive the intersection from the rarest term; probe the others
+        weighted.sort(key=lambda item: sum(len(p.ids) for p, _ in item[0]))
+
+        first, first_idf = weighted[0]
+        scores: Dict[int, float] = {}
+        for postings, factor in first:
+            for doc, weight in zip(postings.ids, postings.weights):
+                score = weight * factor * first_idf
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+
+        results: List[Tuple[float, int]] = []
+        docs = len(positions)
+        for doc, score in scores.items():
+            if doc >= docs:
+                continue
+            pos = positions[doc]
+            if pos < 0:
+                continue
+            for matches, idf in weighted[1:]:
+                best = max(p.weight(doc) * factor for p, factor in matches)
+                if not best:
+                    break
+                score += best * idf
+            else:
+                if subject and subject != 'all' and questions[pos].get('subject') != subject:
+                    continue
+                results.append((score, pos))
+
+        page = heapq.nsmallest(offset + limit, results, key=lambda r: (-r[0], r[1]))[offset:]
+        return len(results), [(pos, score) for score, pos in page]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'documents': self._live,
+            'indexed': self._docs,
+            'terms': len(self._postings),
+        }
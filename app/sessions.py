@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .storage import local_sqlite
+
+
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+
+
+class MemorySessionStore:
+    # Per-process LRU of (session id, key) -> bytes with TTL expiry. Good for a
+    # single worker; use SqliteSessionStore when several workers share traffic.
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 10000, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: 'OrderedDict[Tuple[str, str], Tuple[float, bytes]]' = OrderedDict()
+
+    def get(self, sid: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get((sid, key))
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._data[(sid, key)]
+                return None
+            self._data.move_to_end((sid, key))
+            return value
+
+    def set(self, sid: str, key: str, value: bytes) -> None:
+        with self._lock:
+            self._data[(sid, key)] = (time.time() + self.ttl, bytes(value))
+            self._data.move_to_end((sid, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, sid: str, key: str) -> None:
+        with self._lock:
+            self._data.pop((sid, key), None)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._data)}
+
+
+class SqliteSessionStore:
+    # Shared across worker processes through one SQLite file (WAL mode)
+    name = 'sqlite'
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS practice_sessions (
+            sid TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value BLOB NOT NULL,
+            expires REAL NOT NULL,
+            PRIMARY KEY (sid, key)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_practice_sessions_expires ON practice_sessions (expires);
+    '''
+    # Expired rows are purged every PURGE_EVERY writes rather than on each one
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return local_sqlite(self._local, self.path)
+
+    def get(self, sid: str, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            'SELECT value FROM practice_sessions WHERE sid = ? AND key = ? AND expires > ?',
+            (sid, key, time.time()),
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, sid: str, key: str, value: bytes) -> None:
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO practice_sessions (sid, key, value, expires) VALUES (?, ?, ?, ?)',
+                (sid, key, bytes(value), now + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute('DELETE FROM practice_sessions WHERE expires < ?', (now,))
+
+    def delete(self, sid: str, key: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM practice_sessions WHERE sid = ? AND key = ?', (sid, key))
+
+    def stats(self) -> Dict[str, int]:
+        row = self._connect().execute('SELECT COUNT(*) FROM practice_sessions').fetchone()
+        return {'entries': row[0]}
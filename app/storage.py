@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from typing import IO, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .dedup import content_hash, dedup_key, near_hash
+from .fileio import atomic_write_chunks, file_lock
+from .importer import iter_json_items
+from .indexes import parse_set_label, subject_of
+
+
+Signature = Tuple[Tuple[Any, ...], ...]
+
+BATCH_SIZE = 1000
+
+
+def _read_json_array(file_path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(file_path):
+        return []
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception:
+        return []
+    if isinstance(data, dict) and 'questions' in data and isinstance(data['questions'], list):
+        return data['questions']
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def _iter_json_array(file_path: str) -> Iterator[Any]:
+    # Streaming _read_json_array for rewrites: one item in memory at a time.
+    # A file that stops parsing part-way raises rather than reading as empty,
+    # so a rewrite never drops the questions after the damage.
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, 'r', encoding='utf-8') as f:
+        try:
+            yield from iter_json_items(f)
+        except ValueError as exc:
+            raise ValueError(f'{file_path}: not a readable question file ({exc})') from None
+
+
+def _thaw(obj: Any) -> Any:
+    # json.dump hook: frozen snapshot entries are read-only mappings
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, indent=2, default=_thaw)
+
+
+def encode_questions(questions: Iterable[Any]) -> Iterator[bytes]:
+    # The bytes of json.dumps({'questions': [...]}, ensure_ascii=False,
+    # indent=2), one question at a time. Encoded JSON has no raw newlines
+    # inside strings, so re-indenting an item one level is a replace.
+    sep = '{\n  "questions": [\n    '
+    for q in questions:
+        yield (sep + ''.join(_encoder.iterencode(q)).replace('\n', '\n    ')).encode('utf-8')
+        sep = ',\n    '
+    if sep[0] == '{':
+        yield b'{\n  "questions": []\n}'
+    else:
+        yield b'\n  ]\n}'
+
+
+def split_by_subject(questions: Iterable[Mapping[str, Any]]) -> Tuple[List[Mapping[str, Any]], List[Mapping[str, Any]]]:
+    bdm_questions: List[Mapping[str, Any]] = []
+    mad2_questions: List[Mapping[str, Any]] = []
+    for q in questions:
+        if subject_of(q) == 'mad2':
+            mad2_questions.append(q)
+        else:
+            bdm_questions.append(q)
+    return bdm_questions, mad2_questions
+
+
+def _chunks(items: Iterable[Any], size: int = BATCH_SIZE) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def open_sqlite(path: str) -> sqlite3.Connection:
+    # Connections are per thread; callers keep one via local_sqlite
+    conn = sqlite3.connect(path, timeout=30)
+    # WAL lets readers in other workers proceed while a writer commits
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+# Connections inherited across a fork. SQLite connections must not be used
+# in a forked child, and closing one there would run SQLite's cleanup against
+# file state the parent still owns, so they are kept referenced and unused.
+_inherited: List[sqlite3.Connection] = []
+
+
+def local_sqlite(local: threading.local, path: str) -> sqlite3.Connection:
+    # This thread's connection in this process. The thread-local survives a
+    # fork (e.g. opened by create_app() under gunicorn --preload), so the
+    # connection records the pid that opened it and a worker opens its own.
+    conn: Optional[sqlite3.Connection] = getattr(local, 'conn', None)
+    if conn is not None and local.pid == os.getpid():
+        return conn
+    if conn is not None:
+        _inherited.append(conn)
+    local.conn = conn = open_sqlite(path)
+    local.pid = os.getpid()
+    return conn
+
+
+class JsonStorage:
+    # The original format: BDM questions in questions.json, MAD2 questions in
+    # mad2_questions.json, each as {"questions": [...]}.
+    name = 'json'
+
+    def __init__(self, data_file: str, mad2_file: str, packed_file: Optional[str] = None):
+        self.data_file = data_file
+        self.mad2_file = mad2_file
+        # Optional precompiled copy of both files (see packed.py)
+        self.packed_file = packed_file
+
+    def signature(self) -> Signature:
+        sig = []
+        for path in (self.data_file, self.mad2_file):
+            try:
+                st = os.stat(path)
+            except OSError:
+                sig.append((path, -1, -1))
+                continue
+            sig.append((path, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    @staticmethod
+    def last_modified(signature: Signature) -> Optional[float]:
+        # When the bank last changed: the newer file mtime. The same in every
+        # worker and across restarts, unlike the time a process loaded it.
+        mtimes = [mtime for _, mtime, _ in signature if mtime >= 0]
+        return max(mtimes) / 1e9 if mtimes else None
+
+    def load(self) -> List[Dict[str, Any]]:
+        # Merge BDM (default) and MAD2 question banks
+        return _read_json_array(self.data_file) + _read_json_array(self.mad2_file)
+
+    def load_packed(self):
+        # The mapped pack when it was compiled from the current JSON files;
+        # None (load the JSON) when it is missing, unreadable or stale
+        if not self.packed_file:
+            return None
+        from .packed import PackedBank
+        try:
+            packed = PackedBank(self.packed_file)
+        except (OSError, ValueError):
+            return None
+        return packed if packed.matches((self.data_file, self.mad2_file)) else None
+
+    def iter_questions(self) -> Iterator[Dict[str, Any]]:
+        for q in self.load():
+            if isinstance(q, dict):
+                yield q
+
+    def save(self, questions: Iterable[Mapping[str, Any]]) -> None:
+        # Split questions by subject and persist to respective files
+        bdm_questions, mad2_questions = split_by_subject(questions)
+        with file_lock(self.data_file):
+            self._write(self.data_file, bdm_questions)
+            self._write(self.mad2_file, mad2_questions)
+
+    def append(self, questions: Iterable[Mapping[str, Any]], on_duplicate: str = 'keep', near: bool = False) -> Dict[str, int]:
+        # A JSON document can't be appended to in place. Re-read under the lock
+        # so concurrent writers don't drop each other's additions, and only
+        # rewrite the files that actually changed. Both the existing and the
+        # incoming questions are streamed: new questions are spooled to a
+        # temp file as JSON Lines and each rewrite re-reads its source, so
+        # memory holds the dedup keys and any replaced questions, not the
+        # payload.
+        counts = {'inserted': 0, 'duplicates': 0, 'updated': 0}
+        with file_lock(self.data_file):
+            # dedup key -> (path, spooled?, position)
+            seen: Dict[str, Tuple[str, bool, int]] = {}
+            replaced: Dict[Tuple[str, bool, int], Mapping[str, Any]] = {}
+            spools: Dict[str, IO[bytes]] = {}
+            added: Dict[str, int] = {}
+            if on_duplicate != 'keep':
+                # The files are the persistent index here: hashing what we
+                # just read gives O(1) lookups for the rest of the batch.
+                for path in (self.data_file, self.mad2_file):
+                    for pos, q in enumerate(_iter_json_array(path)):
+                        if isinstance(q, dict):
+                            seen.setdefault(dedup_key(q, near), (path, False, pos))
+
+            try:
+                for q in questions:
+                    key = dedup_key(q, near) if on_duplicate != 'keep' else None
+                    if key is not None and key in seen:
+                        if on_duplicate == 'skip':
+                            counts['duplicates'] += 1
+                            continue
+                        replaced[seen[key]] = q
+                        counts['updated'] += 1
+                        continue
+                    path = self.mad2_file if subject_of(q) == 'mad2' else self.data_file
+                    spool = spools.get(path)
+                    if spool is None:
+                        spool = spools[path] = tempfile.TemporaryFile()
+                        added[path] = 0
+                    spool.write(json.dumps(q, ensure_ascii=False, default=_thaw).encode('utf-8') + b'\n')
+                    if key is not None:
+                        seen[key] = (path, True, added[path])
+                    added[path] += 1
+                    counts['inserted'] += 1
+
+                for path in (self.data_file, self.mad2_file):
+                    if path in spools or any(where[0] == path for where in replaced):
+                        self._write(path, self._merged(path, spools.get(path), replaced))
+            finally:
+                for spool in spools.values():
+                    spool.close()
+        return counts
+
+    @staticmethod
+    def _merged(path: str, spool: Optional[IO[bytes]], replaced: Dict[Tuple[str, bool, int], Mapping[str, Any]]) -> Iterator[Any]:
+        for pos, q in enumerate(_iter_json_array(path)):
+            yield replaced.get((path, False, pos), q)
+        if spool is not None:
+            spool.seek(0)
+            for pos, line in enumerate(spool):
+                q = replaced.get((path, True, pos))
+                yield q if q is not None else json.loads(line)
+
+    def _write(self, path: str, questions: Iterable[Mapping[str, Any]]) -> None:
+        # Streamed into the temp file; an unchanged file is left alone
+        atomic_write_chunks(path, encode_questions(questions))
+
+
+class SqliteStorage:
+    # One row per question. The full record is kept as JSON in `data`, with
+    # subject/topic/set_id broken out into indexed columns for lookups.
+    name = 'sqlite'
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject TEXT NOT NULL,
+            topic TEXT NOT NULL DEFAULT '',
+            set_id INTEGER,
+            data TEXT NOT NULL,
+            content_hash TEXT,
+            near_hash TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_questions_subject ON questions (subject, id);
+        CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions (topic);
+        CREATE INDEX IF NOT EXISTS idx_questions_set ON questions (subject, set_id, id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('modified', CAST(strftime('%s', 'now') AS INTEGER));
+    '''
+
+    HASH_INDEXES = '''
+        CREATE INDEX IF NOT EXISTS idx_questions_hash ON questions (content_hash);
+        CREATE INDEX IF NOT EXISTS idx_questions_near_hash ON questions (near_hash);
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            self._migrate(conn)
+            conn.executescript(self.HASH_INDEXES)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        # Databases created before dedup support lack the hash columns
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(questions)')}
+        if 'content_hash' in columns:
+            return
+        conn.execute('ALTER TABLE questions ADD COLUMN content_hash TEXT')
+        conn.execute('ALTER TABLE questions ADD COLUMN near_hash TEXT')
+        rows = conn.execute('SELECT id, data FROM questions').fetchall()
+        for chunk in _chunks(rows):
+            conn.executemany(
+                'UPDATE questions SET content_hash = ?, near_hash = ? WHERE id = ?',
+                [(content_hash(q), near_hash(q), row_id) for row_id, q in ((r[0], json.loads(r[1])) for r in chunk)],
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return local_sqlite(self._local, self.path)
+
+    @staticmethod
+    def _row(q: Mapping[str, Any]) -> Tuple[str, str, Optional[int], str, str, str]:
+        topic = str(q.get('topic') or '')
+        return (
+            subject_of(q), topic, parse_set_label(topic),
+            json.dumps(q, ensure_ascii=False, default=_thaw),
+            content_hash(q), near_hash(q),
+        )
+
+    def signature(self) -> Signature:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return (('sqlite', self.path, row[0] if row else 0),)
+
+    def last_modified(self, signature: Signature) -> Optional[float]:
+        # Unix time of the last write, stored with the version counter
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'modified'").fetchone()
+        return float(row[0]) if row else None
+
+    def iter_questions(self, subject: Optional[str] = None, set_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        sql = 'SELECT data FROM questions'
+        clauses: List[str] = []
+        params: List[Any] = []
+        if subject is not None:
+            clauses.append('subject = ?')
+            params.append(subject)
+        if set_id is not None:
+            clauses.append('set_id = ?')
+            params.append(set_id)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY id'
+        for (data,) in self._connect().execute(sql, params):
+            yield json.loads(data)
+
+    def load(self) -> List[Dict[str, Any]]:
+        return list(self.iter_questions())
+
+    def save(self, questions: Iterable[Mapping[str, Any]]) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM questions')
+            self._insert(conn, questions)
+            self._bump(conn)
+
+    def append(self, questions: Iterable[Mapping[str, Any]], on_duplicate: str = 'keep', near: bool = False) -> Dict[str, int]:
+        conn = self._connect()
+        with conn:
+            counts = self._insert(conn, questions, on_duplicate, near)
+            if counts['inserted'] or counts['updated']:
+                self._bump(conn)
+        return counts
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        conn.execute("UPDATE meta SET value = CAST(strftime('%s', 'now') AS INTEGER) WHERE key = 'modified'")
+
+    def _insert(self, conn: sqlite3.Connection, questions: Iterable[Mapping[str, Any]],
+                on_duplicate: str = 'keep', near: bool = False) -> Dict[str, int]:
+        counts = {'inserted': 0, 'duplicates': 0, 'updated': 0}
+        column, key_pos = ('near_hash', 5) if near else ('content_hash', 4)
+        lookup = f'SELECT id FROM questions WHERE {column} = ? LIMIT 1'
+        batch: List[Tuple[Any, ...]] = []
+        # Keys of rows queued in `batch` but not yet visible to `lookup`
+        pending: Dict[str, int] = {}
+
+        def flush() -> None:
+            conn.executemany(
+                'INSERT INTO questions (subject, topic, set_id, data, content_hash, near_hash) VALUES (?, ?, ?, ?, ?, ?)',
+                batch,
+            )
+            counts['inserted'] += len(batch)
+            batch.clear()
+            pending.clear()
+
+        for q in questions:
+            row = self._row(q)
+            if on_duplicate != 'keep':
+                key = row[key_pos]
+                if key in pending:
+                    if on_duplicate == 'skip':
+                        counts['duplicates'] += 1
+                    else:
+                        batch[pending[key]] = row
+                        counts['updated'] += 1
+                    continue
+                existing = conn.execute(lookup, (key,)).fetchone()
+                if existing:
+                    if on_duplicate == 'skip':
+                        counts['duplicates'] += 1
+                    else:
+                        conn.execute(
+                            'UPDATE questions SET subject = ?, topic = ?, set_id = ?, data = ?, content_hash = ?, near_hash = ? WHERE id = ?',
+                            row + (existing[0],),
+                        )
+                        counts['updated'] += 1
+                    continue
+                pending[key] = len(batch)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        return counts
+
+
+def copy_questions(source: Any, target: Any) -> int:
+    # One-shot migration between backends, e.g. JSON seed files -> SQLite
+    questions = list(source.iter_questions())
+    target.save(questions)
+    return len(questions)
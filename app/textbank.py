@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .practice import OPTION_KEYS
+
+
+# Parser for the plain-text "Question Bank" dump of past papers:
+#
+#   2025 Jan                         <- exam sitting header
+#   Q1 - What does the law of ...    <- also "Q1.", "Q.1)", "Question 1:"
+#   specific condition?              <- wrapped lines continue the last part
+#   A. ...                           <- also "A) ..."
+#   ANSWER KEY                       <- also "Answers", "Answer Key"
+#   1. A                             <- letters ("AB", "B,C", "c") or option text
+#
+# Questions are buffered for one sitting only, until its answer key has been
+# read, so memory stays flat however many sittings the dump holds.
+
+CHUNK_SIZE = 64 * 1024
+
+SITTING_RE = re.compile(r'^(\d{4})\s+([A-Za-z]{3,9})$')
+KEY_HEADER_RE = re.compile(r'^(?:answer\s+key|answers)$', re.IGNORECASE)
+QUESTION_RE = re.compile(r'^(?:Question|Q)\s*\.?\s*(\d+)\s*[.):\-]*\s*(.*)$')
+# Option letters the rest of the pipeline can store and grade (A-E)
+_LETTERS = ''.join(OPTION_KEYS)
+OPTION_RE = re.compile(rf'^([{_LETTERS}])\s*[.)]\s*(.*)$')
+KEY_ENTRY_RE = re.compile(r'^(\d+)\s*\.\s*(.*)$')
+KEY_LETTERS_RE = re.compile(rf'^[{_LETTERS}](?:\s*,?\s*[{_LETTERS}])*$', re.IGNORECASE)
+# Lines that only carry layout: "Options :", "Question Label : Multiple Choice Question"
+NOISE_RE = re.compile(r'^(?:Options\s*:|Question Label\s*:.*)$', re.IGNORECASE)
+# Shared data for several questions ("Answer Q13,14 on the basis of this") or a
+# numeric entry box ends the question being read
+CONTEXT_RE = re.compile(r'^Answer\b', re.IGNORECASE)
+END_MARK = 'THE END'
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _clean(parts: List[str]) -> str:
+    return _SPACE_RE.sub(' ', ' '.join(parts)).strip()
+
+
+def _wraps(part: List[str], line: str) -> bool:
+    # A wrapped option line carries on mid-sentence; anything else after the
+    # options (tables, "Consider the following ...") belongs to no question
+    return line[0].islower() or (bool(part) and part[-1].rstrip()[-1:] in ',(/&-')
+
+
+def iter_lines(stream: TextIO) -> Iterator[str]:
+    # Chunked reads keep a multi-megabyte dump out of memory
+    rest = ''
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (rest + chunk).split('\n')
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+
+def resolve_answer(entry: str, options: Dict[str, str]) -> Optional[str]:
+    # "C" / "c" / "AB" / "B,C" -> letters; otherwise match the option text
+    entry = _clean([entry])
+    if KEY_LETTERS_RE.match(entry):
+        letters = [c for c in entry.upper() if c in options]
+        return ','.join(sorted(set(letters))) or None
+    wanted = entry.lower().rstrip('.')
+    for key, text in options.items():
+        if text.lower().rstrip('.') == wanted:
+            return key
+    return None
+
+
+class _Sitting:
+    __slots__ = ('label', 'questions', 'key', 'last_key')
+
+    def __init__(self, label: str):
+        self.label = label
+        # [number, text parts, {option: parts}] in file order
+        self.questions: List[Any] = []
+        self.key: Dict[int, List[str]] = {}
+        self.last_key: Optional[int] = None
+
+    def records(self, subject: str) -> Iterator[Dict[str, Any]]:
+        for number, text, options in self.questions:
+            options = {k: _clean(v) for k, v in options.items()}
+            entry = self.key.get(number)
+            yield {
+                'text': _clean(text),
+                'options': options,
+                'answer': resolve_answer(' '.join(entry), options) if entry else None,
+                'topic': f'{self.label} Q{number}' if self.label else f'Q{number}',
+                'subject': subject,
+            }
+
+
+def iter_text_questions(lines: Iterable[str], subject: str = 'bdm') -> Iterator[Dict[str, Any]]:
+    # Raw question dicts in the shape normalize_question() expects; entries the
+    # importer can't use (numeric answers, missing options) are rejected there.
+    sitting = _Sitting('')
+    current: Optional[List[Any]] = None  # [number, text parts, {option: parts}]
+    part: Optional[List[str]] = None     # where wrapped lines are appended
+    in_key = False
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if current is not None and current[2]:
+                # A blank line after the options closes the question
+                current, part = None, None
+            continue
+
+        match = SITTING_RE.match(line)
+        if match or line.upper() == END_MARK:
+            yield from sitting.records(subject)
+            label = f'{match.group(1)} {match.group(2).capitalize()}' if match else ''
+            sitting, current, part, in_key = _Sitting(label), None, None, False
+            continue
+
+        if KEY_HEADER_RE.match(line):
+            in_key, current, part = True, None, None
+            continue
+
+        if in_key:
+            match = KEY_ENTRY_RE.match(line)
+            if match:
+                sitting.last_key = int(match.group(1))
+                sitting.key[sitting.last_key] = [match.group(2)]
+            elif sitting.last_key is not None:
+                sitting.key[sitting.last_key].append(line)
+            continue
+
+        match = QUESTION_RE.match(line)
+        if match:
+            current = [int(match.group(1)), [], {}]
+            sitting.questions.append(current)
+            part = current[1]
+            if not NOISE_RE.match(match.group(2)):
+                part.append(match.group(2))
+            continue
+
+        if current is None:
+            continue
+        if NOISE_RE.match(line):
+            continue
+        if CONTEXT_RE.match(line):
+            current, part = None, None
+            continue
+
+        match = OPTION_RE.match(line)
+        if match:
+            part = current[2].setdefault(match.group(1), [])
+            part.append(match.group(2))
+        elif not current[2] or _wraps(part, line):
+            part.append(line)
+        else:
+            # Shared data or a lead-in for the next questions, not option text
+            current, part = None, None
+
+    yield from sitting.records(subject)
+
+
+def read_text_questions(stream: TextIO, subject: str = 'bdm') -> Iterator[Dict[str, Any]]:
+    return iter_text_questions(iter_lines(stream), subject=subject)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict
+
+from . import load, micro
+from .synthetic import write_bank
+
+
+DEFAULT_SIZES = '1000,10000,100000'
+DEFAULT_OUT = 'bench_results.json'
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(args: argparse.Namespace) -> int:
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    report: Dict[str, Any] = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'sizes': {},
+    }
+    for size in sizes:
+        # Work on synthetic copies so the shipped question files are never touched
+        with tempfile.TemporaryDirectory() as tmp:
+            data_file, mad2_file = write_bank(tmp, size, args.seed)
+            entry: Dict[str, Any] = {}
+            if not args.skip_micro:
+                print(f'[{size}] micro-benchmarks...', file=sys.stderr)
+                entry['micro'] = micro.run(data_file, mad2_file)
+            if not args.skip_load and size <= args.load_max_size:
+                print(f'[{size}] load test: {args.requests} requests x {args.concurrency} threads...', file=sys.stderr)
+                entry['load'] = load.run(data_file, mad2_file, requests=args.requests, concurrency=args.concurrency, seed=args.seed)
+            report['sizes'][str(size)] = entry
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f'Wrote {args.out}', file=sys.stderr)
+    return 0
+
+
+def _flatten(value: Any, prefix: str = '') -> Dict[str, float]:
+    # {"sizes": {"1000": {"micro": {"grade_set": {"median_ms": 1.2}}}}} ->
+    # {"1000 micro grade_set median_ms": 1.2}
+    out: Dict[str, float] = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            out.update(_flatten(item, f'{prefix} {key}'.strip()))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+# Metrics worth diffing between runs; run counts and error tallies are noise
+COMPARED = ('median_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'peak_kb_load_questions_cold', 'retained_kb_snapshot', 'peak_traced_kb')
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.base, encoding='utf-8') as f:
+        base = _flatten(json.load(f).get('sizes', {}))
+    with open(args.head, encoding='utf-8') as f:
+        head = _flatten(json.load(f).get('sizes', {}))
+    regressions = 0
+    for key in sorted(base.keys() & head.keys()):
+        if not key.endswith(COMPARED):
+            continue
+        old, new = base[key], head[key]
+        if not old:
+            continue
+        change = (new - old) / old * 100
+        # Higher throughput is better; for everything else lower is better
+        worse = change < -args.threshold if key.endswith('throughput_rps') else change > args.threshold
+        regressions += worse
+        flag = '  <-- regression' if worse else ''
+        print(f'{key:70} {old:12.3f} {new:12.3f} {change:+8.1f}%{flag}')
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Benchmarks and load tests for the question bank app')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('run', help='Generate synthetic banks, run the benchmarks and write a JSON report')
+    p.add_argument('--sizes', default=DEFAULT_SIZES, help='Comma-separated bank sizes (questions)')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--requests', type=int, default=2000, help='Requests per load test')
+    p.add_argument('--concurrency', type=int, default=8, help='Load test worker threads')
+    p.add_argument('--skip-micro', action='store_true')
+    p.add_argument('--skip-load', action='store_true')
+    p.add_argument('--load-max-size', type=int, default=10000,
+                   help='Skip the load test for larger banks (each import rewrites the whole JSON bank)')
+    p.add_argument('--out', default=DEFAULT_OUT)
+    p.set_defaults(func=run)
+
+    p = commands.add_parser('compare', help='Diff two reports; exits 1 if anything regressed past the threshold')
+    p.add_argument('base')
+    p.add_argument('head')
+    p.add_argument('--threshold', type=float, default=10.0, help='Allowed change in percent')
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    # Run from the repository root: python -m bench run|compare ...
+    sys.exit(main())
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import random
+import resource
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from app import create_app, routes
+from app.storage import JsonStorage
+
+
+# Request mix as (weight, name); each name maps to a function that issues
+# the request through a Flask test client
+DEFAULT_MIX = (
+    (30, 'get_index'),
+    (15, 'get_practice'),
+    (15, 'post_practice_answer'),
+    (15, 'get_solve_set'),
+    (10, 'post_solve_set'),
+    (10, 'get_search'),
+    (5, 'post_import'),
+)
+
+
+def _percentile(sorted_ms: List[float], pct: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    k = min(len(sorted_ms) - 1, max(0, int(round(pct / 100 * (len(sorted_ms) - 1)))))
+    return round(sorted_ms[k], 3)
+
+
+def _requests(set_size: int) -> Dict[str, Callable[[Any, random.Random], Any]]:
+    def get_index(client, rng):
+        return client.get('/')
+
+    def get_practice(client, rng):
+        return client.get(f'/practice?q={rng.randint(1, 50)}')
+
+    def post_practice_answer(client, rng):
+        return client.post('/api/practice/bdm/answer', json={'question_number': rng.randint(1, 50), 'answer': rng.choice('ABCD')})
+
+    def get_solve_set(client, rng):
+        return client.get('/solve-set/1')
+
+    def post_solve_set(client, rng):
+        form = {f'ans_{i}': rng.choice('ABCD') for i in range(1, set_size + 1)}
+        return client.post('/solve-set/1', data=form)
+
+    def get_search(client, rng):
+        return client.get(f"/api/search?q={rng.choice(['price', 'demand sto', 'cache', 'inv'])}")
+
+    def post_import(client, rng):
+        n = rng.randint(0, 10 ** 9)
+        payload = [{
+            'text': f'Load test question {n}?',
+            'options': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'},
+            'answer': 'A',
+            'topic': 'Load test',
+        }]
+        return client.post('/import', data={'payload': json.dumps(payload)})
+
+    return {fn.__name__: fn for fn in (get_index, get_practice, post_practice_answer, get_solve_set, post_solve_set, get_search, post_import)}
+
+
+def run(data_file: str, mad2_file: str, requests: int = 2000, concurrency: int = 8, seed: int = 0,
+        mix: Tuple[Tuple[int, str], ...] = DEFAULT_MIX) -> Dict[str, Any]:
+    # Drives the real app (create_app + test clients, one per worker thread)
+    # with a weighted GET/POST mix and reports latency per request kind
+    app = create_app()
+    routes.bank.use(JsonStorage(data_file, mad2_file))
+    set_size = len(routes.set_questions('bdm', 1))
+    handlers = _requests(set_size)
+    weights = [w for w, _ in mix]
+    names = [name for _, name in mix]
+    plan = random.Random(seed).choices(names, weights=weights, k=requests)
+
+    local = threading.local()
+    lock = threading.Lock()
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+
+    def issue(item: Tuple[int, str]) -> None:
+        i, name = item
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+            local.rng = random.Random(seed + threading.get_ident())
+        t0 = time.perf_counter()
+        response = handlers[name](client, local.rng)
+        elapsed = (time.perf_counter() - t0) * 1000
+        with lock:
+            latencies[name].append(elapsed)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    # Warm caches once so the numbers describe steady state
+    with app.test_client() as client:
+        client.get('/')
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(issue, enumerate(plan)))
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def summarize(ms: List[float]) -> Dict[str, Any]:
+        ms = sorted(ms)
+        return {
+            'count': len(ms),
+            'p50_ms': _percentile(ms, 50),
+            'p95_ms': _percentile(ms, 95),
+            'p99_ms': _percentile(ms, 99),
+            'max_ms': round(ms[-1], 3) if ms else 0.0,
+        }
+
+    everything = [ms for values in latencies.values() for ms in values]
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'seconds': round(wall, 3),
+        'throughput_rps': round(requests / wall, 1) if wall else 0.0,
+        'overall': summarize(everything),
+        'routes': {name: dict(summarize(latencies[name]), errors=errors[name]) for name in names},
+        'peak_traced_kb': round(peak / 1024, 1),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
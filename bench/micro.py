@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app import routes
+from app.bank import QuestionBank
+from app.grading import AnswerKey
+from app.packed import write_pack
+from app.search import SearchIndex
+from app.storage import JsonStorage, _read_json_array
+
+
+# Each benchmark runs at least MIN_RUNS times and until TIME_BUDGET seconds
+# have passed, capped at MAX_RUNS
+MIN_RUNS = 3
+MAX_RUNS = 200
+TIME_BUDGET = 0.5
+
+GRADE_BATCH = 1000
+
+
+def measure(fn: Callable[[], Any], setup: Callable[[], Any] = None) -> Dict[str, float]:
+    timings: List[float] = []
+    started = time.perf_counter()
+    while len(timings) < MAX_RUNS and (len(timings) < MIN_RUNS or time.perf_counter() - started < TIME_BUDGET):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return {
+        'runs': len(timings),
+        'min_ms': round(min(timings), 4),
+        'median_ms': round(statistics.median(timings), 4),
+        'max_ms': round(max(timings), 4),
+    }
+
+
+def peak_kb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def retained_kb(fn: Callable[[], Any]) -> float:
+    # Memory still held by what fn returns, e.g. a loaded snapshot
+    tracemalloc.start()
+    try:
+        kept = fn()
+        size = tracemalloc.get_traced_memory()[0]
+        del kept
+        return round(size / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def run(data_file: str, mad2_file: str) -> Dict[str, Any]:
+    # Points the app's module-level bank at the synthetic files, then times
+    # the data-layer entry points the routes use
+    bank = routes.bank
+    bank.use(JsonStorage(data_file, mad2_file))
+    questions = routes.load_questions()
+    results: Dict[str, Any] = {}
+
+    results['read_json_array'] = measure(lambda: _read_json_array(data_file))
+    results['load_questions_cold'] = measure(routes.load_questions, setup=bank.invalidate)
+    results['load_questions_warm'] = measure(routes.load_questions)
+
+    # Same bank through a precompiled pack next to the synthetic files
+    packed_file = os.path.join(os.path.dirname(data_file), 'questions.pack')
+    results['pack_build'] = measure(lambda: write_pack(packed_file, questions, (data_file, mad2_file)))
+    packed_bank = QuestionBank(JsonStorage(data_file, mad2_file, packed_file))
+    results['load_questions_packed_cold'] = measure(lambda: packed_bank.snapshot().by_set('bdm', 1)[0], setup=packed_bank.invalidate)
+
+    results['save_questions_unchanged'] = measure(lambda: routes.save_questions(questions))
+    edits = iter(range(10 ** 9))
+
+    def save_changed() -> None:
+        # Touch one question so the store really rewrites the file
+        changed = list(questions)
+        changed[0] = dict(changed[0], text=f"{questions[0]['text']} [{next(edits)}]")
+        routes.save_questions(changed)
+
+    results['save_questions_changed'] = measure(save_changed)
+    routes.save_questions(questions)
+
+    results['filter_by_set_linear'] = measure(lambda: routes.filter_by_set(questions, 1))
+    results['filter_by_subject_linear'] = measure(lambda: routes.filter_by_subject(questions, 'mad2'))
+    routes.set_questions('bdm', 1)
+    results['set_questions_indexed'] = measure(lambda: list(routes.set_questions('bdm', 1)))
+    results['subject_questions_indexed'] = measure(lambda: len(routes.subject_questions('mad2')))
+
+    snapshot = bank.snapshot()
+    index = SearchIndex()
+    results['search_index_build'] = measure(lambda: SearchIndex().sync(snapshot))
+    index.sync(snapshot)
+    results['search_query'] = measure(lambda: index.search('price demand', limit=20))
+    results['search_prefix_query'] = measure(lambda: index.search('inv', limit=20))
+
+    paper = list(routes.set_questions('bdm', 1))
+    key = AnswerKey(paper)
+    submission = bytes(key.masks[::-1])
+    results['answer_key_compile'] = measure(lambda: AnswerKey(paper))
+    results['grade_set'] = measure(lambda: key.grade(submission))
+    submissions = [bytes((i + j) % 16 for j in range(len(key))) for i in range(GRADE_BATCH)]
+    results['grade_batch_1000'] = measure(lambda: key.grade_batch(submissions))
+
+    results['peak_kb_load_questions_cold'] = peak_kb(lambda: (bank.invalidate(), routes.load_questions()))
+    bank.invalidate()
+    results['retained_kb_snapshot'] = retained_kb(bank.snapshot)
+    results['questions'] = len(questions)
+    return results
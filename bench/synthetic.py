@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+from typing import Any, Dict, List, Tuple
+
+
+BDM_TOPICS = (
+    'Demand', 'Elasticity', 'Inventory', 'Excel', 'A/B testing', 'FinTech risk',
+    'HR channels', 'Distribution', 'OEE', 'EOQ', 'Data sources', 'BNPL',
+)
+MAD2_TOPICS = (
+    'Hoisting', 'Closures', 'Promises', 'Vue reactivity', 'Vue router', 'Vuex',
+    'REST', 'JWT', 'Celery', 'Redis', 'Caching', 'Performance',
+)
+SITTINGS = ('2023 Jan', '2023 May', '2023 Sept', '2024 Jan', '2024 May', '2024 Dec', '2025 Jan')
+WORDS = (
+    'price demand supply market customer revenue cost margin inventory order '
+    'stock forecast sheet formula lookup range filter cohort test variant '
+    'metric conversion churn loan credit default score interest channel '
+    'referral hiring vendor store route state component request token queue '
+    'worker cache latency throughput index query session render template'
+).split()
+
+# Share of generated questions that go to MAD2, and that carry a multi-select key
+MAD2_SHARE = 0.2
+MULTI_SHARE = 0.05
+# Questions per predicted set, matching the shipped banks
+SET_SIZE = 25
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return ' '.join(words).capitalize()
+
+
+def make_question(rng: random.Random, subject: str, n: int) -> Dict[str, Any]:
+    # Topics follow the shipped banks: "Set 2 Q4 - Demand", "MAD2 Set1 Q3 -
+    # Hoisting", plus past-paper sittings like "2024 May Q7" for BDM
+    set_id, number = divmod(n, SET_SIZE)
+    if subject == 'mad2':
+        topic = f'MAD2 Set{set_id + 1} Q{number + 1} - {rng.choice(MAD2_TOPICS)}'
+    elif rng.random() < 0.3:
+        topic = f'{rng.choice(SITTINGS)} Q{number + 1}'
+    else:
+        topic = f'Set {set_id + 1} Q{number + 1} - {rng.choice(BDM_TOPICS)}'
+    if rng.random() < MULTI_SHARE:
+        answer = ','.join(sorted(rng.sample('ABCD', 2)))
+    else:
+        answer = rng.choice('ABCD')
+    return {
+        'text': f'{_sentence(rng, 8, 24)} (#{subject}-{n})?',
+        'options': {key: _sentence(rng, 2, 10) for key in 'ABCD'},
+        'answer': answer,
+        'topic': topic,
+        'subject': subject,
+    }
+
+
+def make_bank(size: int, seed: int = 0) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # (BDM questions, MAD2 questions); the same size and seed give the same bank
+    rng = random.Random(seed)
+    mad2_count = int(size * MAD2_SHARE)
+    bdm = [make_question(rng, 'bdm', n) for n in range(size - mad2_count)]
+    mad2 = [make_question(rng, 'mad2', n) for n in range(mad2_count)]
+    return bdm, mad2
+
+
+def write_bank(directory: str, size: int, seed: int = 0) -> Tuple[str, str]:
+    # Writes questions.json and mad2_questions.json in the shipped
+    # {"questions": [...]} layout and returns their paths
+    bdm, mad2 = make_bank(size, seed)
+    paths = []
+    for name, questions in (('questions.json', bdm), ('mad2_questions.json', mad2)):
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'questions': questions}, f, ensure_ascii=False)
+        paths.append(path)
+    return paths[0], paths[1]
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from app.routes import DATA_FILE, MAD2_FILE, PACKED_FILE
+from app.analytics import AttemptLog, question_key
+from app.dedup import DUPLICATE_MODES
+from app.grading import key_mask
+from app.importer import import_auto, import_stream, import_text
+from app.packed import write_pack
+from app.storage import JsonStorage, SqliteStorage, copy_questions
+
+
+def _storage(args: argparse.Namespace):
+    if args.db:
+        return SqliteStorage(args.db)
+    return JsonStorage(args.data_file, args.mad2_file)
+
+
+def migrate(args: argparse.Namespace) -> int:
+    source = JsonStorage(args.data_file, args.mad2_file)
+    count = copy_questions(source, SqliteStorage(args.db))
+    print(f'Migrated {count} questions from JSON into {args.db}')
+    return 0
+
+
+def export(args: argparse.Namespace) -> int:
+    target = JsonStorage(args.data_file, args.mad2_file)
+    count = copy_questions(SqliteStorage(args.db), target)
+    print(f'Exported {count} questions from {args.db} to {args.data_file} and {args.mad2_file}')
+    return 0
+
+
+def pack(args: argparse.Namespace) -> int:
+    source = JsonStorage(args.data_file, args.mad2_file)
+    count = write_pack(args.out, source.load(), (args.data_file, args.mad2_file))
+    print(f'Packed {count} questions from {args.data_file} and {args.mad2_file} into {args.out}')
+    return 0
+
+
+def rescore(args: argparse.Namespace) -> int:
+    # Re-grade the attempt log against the bank's current answer keys
+    key_masks = {question_key(q): key_mask(q.get('answer')) for q in _storage(args).load() if isinstance(q, dict)}
+    total, changed = AttemptLog(args.log).rescore(key_masks)
+    print(f'Re-scored {total} attempts in {args.log}: {changed} changed. Restart running workers to pick up the new outcomes.')
+    return 0
+
+
+def import_file(args: argparse.Namespace) -> int:
+    storage = _storage(args)
+    options = {'on_duplicate': args.on_duplicate, 'near': args.near}
+    with open(args.path, 'r', encoding='utf-8') as f:
+        if args.format == 'json':
+            report = import_stream(f, storage, **options)
+        elif args.format == 'text':
+            report = import_text(f, storage, subject=args.subject, **options)
+        else:
+            report = import_auto(f, storage, subject=args.subject, **options)
+    stats = report.as_dict()
+    print(
+        f"Imported {stats['inserted']} questions, rejected {stats['rejected']}, "
+        f"skipped {stats['duplicates']} duplicates, updated {stats['updated']} "
+        f"in {stats['seconds']}s ({stats['items_per_second']} items/s)"
+    )
+    return 0 if report.accepted else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Question bank maintenance commands')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('migrate', help='Load the JSON question files into an SQLite store')
+    p.add_argument('--db', required=True, help='SQLite database path (created if missing)')
+    p.add_argument('--data-file', default=DATA_FILE)
+    p.add_argument('--mad2-file', default=MAD2_FILE)
+    p.set_defaults(func=migrate)
+
+    p = commands.add_parser('export', help='Write an SQLite store back out as the JSON question files')
+    p.add_argument('--db', required=True)
+    p.add_argument('--data-file', default=DATA_FILE)
+    p.add_argument('--mad2-file', default=MAD2_FILE)
+    p.set_defaults(func=export)
+
+    p = commands.add_parser('pack', help='Compile the JSON question files into a memory-mapped snapshot for fast cold starts')
+    p.add_argument('--out', default=PACKED_FILE)
+    p.add_argument('--data-file', default=DATA_FILE)
+    p.add_argument('--mad2-file', default=MAD2_FILE)
+    p.set_defaults(func=pack)
+
+    p = commands.add_parser('rescore', help='Re-grade logged attempts against the current answer keys (after a key correction)')
+    p.add_argument('--log', default=os.environ.get('ATTEMPT_LOG') or 'attempts.log', help='Attempt log path (default: $ATTEMPT_LOG)')
+    p.add_argument('--db', help='SQLite database path; defaults to the JSON files')
+    p.add_argument('--data-file', default=DATA_FILE)
+    p.add_argument('--mad2-file', default=MAD2_FILE)
+    p.set_defaults(func=rescore)
+
+    p = commands.add_parser('import', help='Stream questions from JSON, JSON Lines or a plain-text Question Bank file into the store')
+    p.add_argument('path')
+    p.add_argument('--format', choices=('auto', 'json', 'text'), default='auto',
+                   help='auto treats input starting with [ or { as JSON and anything else as Question Bank text')
+    p.add_argument('--subject', default='bdm', help='Subject for questions from Question Bank text')
+    p.add_argument('--db', help='SQLite database path; defaults to the JSON files')
+    p.add_argument('--data-file', default=DATA_FILE)
+    p.add_argument('--mad2-file', default=MAD2_FILE)
+    p.add_argument('--on-duplicate', choices=DUPLICATE_MODES, default='skip')
+    p.add_argument('--near', action='store_true', help='Match duplicates ignoring case, whitespace and punctuation')
+    p.set_defaults(func=import_file)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import time
+
+from app.analytics import RECORD, AttemptLog, AttemptRecorder, encode_attempts, question_key
+
+
+def attempt(n: int):
+    return (1700000000 + n, n, 1, 1, 0, f'Topic {n}')
+
+
+def test_append_after_torn_write(tmp_path):
+    path = str(tmp_path / 'attempts.log')
+    with open(path, 'wb') as f:
+        f.write(encode_attempts([attempt(1), attempt(2)]))
+        # A crash part-way through the next batch
+        f.write(encode_attempts([attempt(3)])[:RECORD.size + 2])
+
+    log = AttemptLog(path)
+    assert list(log.replay()) == [attempt(1), attempt(2)]
+    log.append([attempt(4), attempt(5)])
+
+    assert list(AttemptLog(path).replay()) == [attempt(1), attempt(2), attempt(4), attempt(5)]
+
+
+def test_append_repairs_tail_torn_by_another_writer(tmp_path):
+    path = str(tmp_path / 'attempts.log')
+    log = AttemptLog(path)
+    log.append([attempt(1)])
+    with open(path, 'ab') as f:
+        # Another worker's whole batch, then a torn one
+        f.write(encode_attempts([attempt(2)]))
+        f.write(encode_attempts([attempt(3)])[:RECORD.size - 4])
+
+    log.append([attempt(4)])
+
+    assert list(AttemptLog(path).replay()) == [attempt(1), attempt(2), attempt(4)]
+
+
+Q = {'text': 'Q', 'options': {'A': '1', 'E': '2'}, 'answer': 'E', 'topic': '2025 Jan Q9'}
+
+
+def test_flush_waits_for_batch_held_by_writer():
+    recorder = AttemptRecorder()
+    # The writer would hold its batch for a minute waiting for more
+    recorder.FLUSH_INTERVAL = 60.0
+    recorder.record(Q, 'E', True, 'practice')
+    deadline = time.monotonic() + 5
+    while not recorder._queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert recorder._queue.empty()  # taken by the writer thread, not yet written
+
+    recorder.flush()
+
+    assert recorder.summary()['attempts'] == 1
+    assert recorder.question_counts(question_key(Q)) == [1, 1, 1, 0, 0, 0, 0, 1]
+    recorder.close()
+
+
+def test_recorders_share_one_log(tmp_path):
+    # Two workers on one log: each serves the other's attempts too
+    path = str(tmp_path / 'attempts.log')
+    first = AttemptRecorder(AttemptLog(path))
+    second = AttemptRecorder(AttemptLog(path))
+    for recorder in (first, second):
+        recorder.FLUSH_INTERVAL = 60.0
+
+    first.record(Q, 'E', True, 'practice')
+    first.flush()
+    second.record(Q, 'A', False, 'set')
+    second.flush()
+
+    for recorder in (first, second):
+        recorder.refresh()
+        assert recorder.question_counts(question_key(Q)) == [2, 1, 2, 1, 0, 0, 0, 1]
+        assert recorder.summary()['attempts'] == 2
+        recorder.close()
+
+
+def test_rescore_after_answer_key_correction(tmp_path):
+    from app.analytics import CORRECT, UNGRADED, WRONG
+    from app.grading import key_mask
+
+    path = str(tmp_path / 'attempts.log')
+    fixed = {'text': 'Fixed', 'options': {'A': '1', 'B': '2'}, 'answer': 'B'}
+    gone = {'text': 'Gone', 'options': {'A': '1', 'B': '2'}, 'answer': 'A'}
+    log = AttemptLog(path)
+    # Graded when the key for "Fixed" still said A
+    log.append([
+        (1, question_key(fixed), 1, CORRECT, 0, 'T'),
+        (2, question_key(fixed), 2, WRONG, 0, 'T'),
+        (3, question_key(gone), 1, CORRECT, 0, 'T'),
+    ])
+
+    assert log.rescore({question_key(fixed): key_mask(fixed['answer'])}) == (3, 2)
+
+    outcomes = [a[3] for a in AttemptLog(path).replay()]
+    assert outcomes == [WRONG, CORRECT, CORRECT]
+    assert log.rescore({question_key(fixed): key_mask('F')}) == (3, 2)
+    assert [a[3] for a in AttemptLog(path).replay()][:2] == [UNGRADED, UNGRADED]
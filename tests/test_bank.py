@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+import os
+
+from app.bank import QuestionBank
+from app.storage import JsonStorage, SqliteStorage
+
+
+QUESTIONS = [
+    {'text': 'What does the law of demand state?', 'options': {'A': 'Up', 'B': 'Down'}, 'answer': 'B', 'topic': '2025 Jan Q1', 'subject': 'bdm'},
+    {'text': 'Which hook runs first?', 'options': {'A': 'created', 'B': 'mounted'}, 'answer': 'A', 'topic': 'Vue', 'subject': 'mad2'},
+]
+
+
+def json_storage(tmp_path):
+    data_file, mad2_file = str(tmp_path / 'questions.json'), str(tmp_path / 'mad2.json')
+    for path, subject in ((data_file, 'bdm'), (mad2_file, 'mad2')):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'questions': [q for q in QUESTIONS if q['subject'] == subject]}, f)
+    os.utime(data_file, ns=(1_700_000_000_000_000_000,) * 2)
+    os.utime(mad2_file, ns=(1_700_000_100_000_000_000,) * 2)
+    return data_file, mad2_file
+
+
+def test_snapshot_modified_comes_from_the_files(tmp_path):
+    data_file, mad2_file = json_storage(tmp_path)
+    # Two workers loading at different times agree on Last-Modified
+    first = QuestionBank(JsonStorage(data_file, mad2_file)).snapshot()
+    second = QuestionBank(JsonStorage(data_file, mad2_file)).snapshot()
+
+    assert first.modified == second.modified == 1_700_000_100.0
+    assert first.created != first.modified
+
+
+def test_snapshot_modified_comes_from_sqlite_writes(tmp_path):
+    path = str(tmp_path / 'questions.db')
+    storage = SqliteStorage(path)
+    storage.save(QUESTIONS)
+    conn = storage._connect()
+    with conn:
+        conn.execute("UPDATE meta SET value = 1600000000 WHERE key = 'modified'")
+
+    assert QuestionBank(SqliteStorage(path)).snapshot().modified == 1_600_000_000.0
+    storage.append([dict(QUESTIONS[0], text='A new question')])
+    assert QuestionBank(SqliteStorage(path)).snapshot().modified > 1_600_000_000.0
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from app.dedup import content_hash, dedup_key, near_hash
+
+
+BASE = {'text': 'What does the law of demand state?', 'options': {'A': 'Price up, demand down', 'B': 'Price up, demand up'},
+        'answer': 'A', 'topic': '2025 Jan Q1', 'subject': 'bdm'}
+
+
+def test_content_hash_ignores_answer_topic_and_spacing():
+    corrected = dict(BASE, answer='B', topic='Demand', text='What  does the law of demand state? ')
+
+    assert content_hash(corrected) == content_hash(BASE)
+    assert content_hash(dict(BASE, text='What does the law of supply state?')) != content_hash(BASE)
+    assert content_hash(dict(BASE, subject='mad2')) != content_hash(BASE)
+
+
+def test_near_hash_ignores_case_and_punctuation():
+    variant = dict(BASE, text='what does the LAW of demand state', options={'A': 'price up demand down', 'B': 'Price up; demand up.'})
+
+    assert near_hash(variant) == near_hash(BASE)
+    assert content_hash(variant) != content_hash(BASE)
+    assert dedup_key(variant, near=True) == dedup_key(BASE, near=True)
+    assert dedup_key(variant) != dedup_key(BASE)
+
+
+def test_hash_covers_options_past_d():
+    with_e = dict(BASE, options=dict(BASE['options'], C='c', D='d', E='Neither'))
+    other_e = dict(BASE, options=dict(BASE['options'], C='c', D='d', E='Both'))
+
+    assert content_hash(with_e) != content_hash(other_e)
+    assert near_hash(with_e) != near_hash(other_e)
+    # Option order doesn't matter
+    assert content_hash(dict(with_e, options=dict(reversed(list(with_e['options'].items()))))) == content_hash(with_e)
+
+
+def test_a_to_d_hashes_are_stable():
+    # Stored SQLite hashes depend on this value staying put
+    q = {'text': 'q', 'options': {'A': '1', 'B': '2', 'C': '3', 'D': '4'}}
+
+    assert content_hash(q) == '2d3eeb7e4cbed3d8709643b2577ee031'
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import pytest
+
+from app.grading import AnswerKey, key_mask, question_credit
+from app.practice import mask_to_answer, option_mask
+
+
+def test_key_mask_is_all_or_nothing():
+    assert key_mask('A') == 1
+    assert key_mask('a, e') == 17
+    assert key_mask('A,F') == 0
+    assert key_mask(None) == 0
+    assert mask_to_answer(option_mask('E,B')) == 'B,E'
+
+
+@pytest.mark.parametrize('key, selected, credit', [
+    ('B', 'B', 1.0),
+    ('B', 'A', 0.0),
+    ('A,C', 'A', 0.5),
+    ('A,C', 'A,B', 0.0),
+    ('A,C,E', 'C,E', 2 / 3),
+    ('E', 'E', 1.0),
+    (None, 'A', 0.0),
+])
+def test_question_credit(key, selected, credit):
+    assert question_credit(key_mask(key), option_mask(selected)) == pytest.approx(credit)
+
+
+def test_grade_batch_matches_credits():
+    key = AnswerKey([{'answer': a} for a in ('A', 'B,D', 'E', None)])
+    submissions = [bytes(option_mask(s) for s in row) for row in (
+        ('A', 'B,D', 'E', 'A'),
+        ('B', 'B', 'A', ''),
+        ('A', 'D', 'E', 'C'),
+    )]
+
+    assert key.grade_batch(submissions) == pytest.approx([sum(key.credits(s)) for s in submissions])
+    assert key.grade_batch(submissions) == pytest.approx([3.0, 0.5, 2.5])
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from app.indexes import BankIndex
+from app.packed import RAW, PackedBank, _pack_one, write_pack
+from app.records import freeze
+
+
+QUESTIONS = [
+    {'text': 'Law of demand?', 'options': {'A': 'Up', 'B': 'Down'}, 'answer': 'B', 'topic': 'Set 1 Q1 - Demand', 'subject': 'bdm'},
+    {'text': 'Pick all that apply', 'options': {'A': 'x', 'B': 'y', 'C': 'z', 'D': 'w', 'E': 'v'}, 'answer': 'A,E', 'topic': '2023 May Q9'},
+    {'text': 'Which hook runs first?', 'options': {'A': 'created', 'B': 'mounted'}, 'topic': 'MAD2 Set1 Q2 - Vue', 'subject': 'mad2',
+     'explanation': 'created runs before mounting', 'tags': ['vue']},
+    # Not representable as NUL-joined strings: stored as raw JSON
+    {'text': 'Nul\0inside', 'options': {'A': '1', 'B': '2'}, 'answer': 'A', 'subject': 'bdm'},
+    {'text': 'Numeric answer', 'options': {'A': '1', 'B': '2'}, 'answer': 3, 'subject': 'mad2', 'topic': 'MAD2 Set1 Q3 - JS'},
+]
+
+
+def sources(tmp_path):
+    paths = []
+    for name, subject in (('questions.json', 'bdm'), ('mad2.json', 'mad2')):
+        path = str(tmp_path / name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'questions': [q for q in QUESTIONS if q.get('subject', 'bdm') == subject]}, f)
+        paths.append(path)
+    return tuple(paths)
+
+
+def test_pack_round_trip(tmp_path):
+    paths = sources(tmp_path)
+    out = str(tmp_path / 'questions.pack')
+
+    assert write_pack(out, QUESTIONS, paths) == len(QUESTIONS)
+    pack = PackedBank(out)
+
+    frozen = [freeze(q) for q in QUESTIONS]
+    assert len(pack.questions) == len(QUESTIONS)
+    assert [dict(q) for q in pack.questions] == [dict(q) for q in frozen]
+    assert dict(pack.questions[1]['options']) == QUESTIONS[1]['options']
+    assert pack.questions[-1] is pack.questions[len(QUESTIONS) - 1]
+
+    index, expected = pack.index(), BankIndex(frozen)
+    assert index.by_subject == expected.by_subject
+    assert index.by_set == expected.by_set
+
+
+def test_raw_fallback_only_when_needed():
+    assert _pack_one(QUESTIONS[0])[2] & RAW == 0
+    assert _pack_one(QUESTIONS[2])[2] & RAW == 0
+    assert _pack_one(QUESTIONS[3])[2] == RAW
+    assert _pack_one(QUESTIONS[4])[2] == RAW
+
+
+def test_pack_goes_stale_when_sources_change(tmp_path):
+    paths = sources(tmp_path)
+    out = str(tmp_path / 'questions.pack')
+    write_pack(out, QUESTIONS, paths)
+
+    # Same content with a new mtime (a fresh checkout) still matches
+    os.utime(paths[0], ns=(1, 1))
+    assert PackedBank(out).matches(paths)
+
+    with open(paths[1], 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert not PackedBank(out).matches(paths)
+
+
+def test_truncated_pack_is_rejected(tmp_path):
+    paths = sources(tmp_path)
+    out = str(tmp_path / 'questions.pack')
+    write_pack(out, QUESTIONS, paths)
+    with open(out, 'r+b') as f:
+        f.truncate(os.path.getsize(out) - 3)
+
+    with pytest.raises(ValueError, match='truncated'):
+        PackedBank(out)
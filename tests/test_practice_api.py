@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for name in ('QUESTION_DB', 'PRACTICE_SESSION_DB', 'ATTEMPT_LOG', 'PRELOAD_BANK', 'PROFILE_DIR'):
+        monkeypatch.delenv(name, raising=False)
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    'A',
+    {'question_number': 1, 'answer': 3},
+    {'question_number': 1, 'answer': ['A']},
+    {'question_number': 1},
+])
+def test_answer_rejects_malformed_payloads(client, body):
+    response = client.post('/api/practice/bdm/answer', json=body)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Choose an answer for a valid question.'}
+
+
+def test_answer_records_json_and_form_answers(client):
+    assert client.post('/api/practice/bdm/answer', json={'question_number': 1, 'answer': 'A'}).status_code == 200
+    response = client.post('/api/practice/bdm/answer', data={'question_number': '2', 'answer': 'B'})
+
+    assert response.status_code == 200
+    assert response.get_json()['stats']['answered'] == 2
+
+
+def test_unknown_scope_is_404(client):
+    assert client.post('/api/practice/nonsense/answer', json={'question_number': 1, 'answer': 'A'}).status_code == 404
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import math
+from types import SimpleNamespace
+
+from app import search
+from app.search import SearchIndex
+
+
+def snapshot(version, texts):
+    questions = tuple({'text': text, 'options': {'A': 'yes', 'B': 'no'}, 'topic': 'Demand', 'subject': 'bdm'}
+                      for text in texts)
+    return SimpleNamespace(version=version, questions=questions)
+
+
+def test_search_ranks_topic_and_text_matches():
+    index = SearchIndex().sync(snapshot(1, ['Elasticity of demand', 'Supply curve shifts', 'Price elasticity']))
+
+    total, hits = index.search('elastic')
+
+    assert total == 2
+    assert sorted(pos for pos, _ in hits) == [0, 2]
+    assert index.search('supply curve')[1][0][0] == 1
+
+
+def test_search_skips_docs_added_by_a_concurrent_sync(monkeypatch):
+    index = SearchIndex().sync(snapshot(1, ['Elasticity of demand']))
+    newer = snapshot(2, ['Elasticity of demand'] + [f'Elasticity case {i}' for i in range(5)])
+    calls = []
+
+    class SyncingMath:
+        # Runs a sync() between the index lock being released and scoring
+        @staticmethod
+        def log(x):
+            if not calls:
+                calls.append(x)
+                index.sync(newer)
+            return math.log(x)
+
+    monkeypatch.setattr(search, 'math', SyncingMath)
+    total, hits = index.search('elasticity')
+
+    assert calls
+    assert total == 1 and hits[0][0] == 0
+    monkeypatch.undo()
+    assert index.search('elasticity')[0] == 6
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+
+from bench.__main__ import main
+from bench.synthetic import SET_SIZE, make_bank, write_bank
+from app.importer import normalize_question
+from app.indexes import BankIndex
+
+
+def test_same_seed_same_bank():
+    assert make_bank(200, seed=3) == make_bank(200, seed=3)
+    assert make_bank(200, seed=3) != make_bank(200, seed=4)
+
+
+def test_bank_shape():
+    bdm, mad2 = make_bank(500, seed=1)
+
+    assert (len(bdm), len(mad2)) == (400, 100)
+    assert all(q['subject'] == 'bdm' for q in bdm) and all(q['subject'] == 'mad2' for q in mad2)
+    # Every generated question survives the importer unchanged
+    assert all(normalize_question(q) == q for q in bdm + mad2)
+    index = BankIndex(bdm + mad2)
+    assert len(index.set_ids('mad2', 1)) == SET_SIZE
+    assert len({q['text'] for q in bdm + mad2}) == 500
+
+
+def test_write_bank_uses_shipped_layout(tmp_path):
+    data_file, mad2_file = write_bank(str(tmp_path), 50, seed=2)
+    bdm, mad2 = make_bank(50, seed=2)
+
+    with open(data_file, encoding='utf-8') as f:
+        assert json.load(f) == {'questions': bdm}
+    with open(mad2_file, encoding='utf-8') as f:
+        assert json.load(f) == {'questions': mad2}
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    def report(name, median, rps):
+        path = tmp_path / name
+        path.write_text(json.dumps({'sizes': {'1000': {
+            'micro': {'grade_set': {'median_ms': median, 'runs': 5}},
+            'load': {'throughput_rps': rps},
+        }}}))
+        return str(path)
+
+    base = report('base.json', 1.0, 100.0)
+    assert main(['compare', base, report('same.json', 1.05, 98.0)]) == 0
+    assert main(['compare', base, report('slower.json', 1.5, 100.0)]) == 1
+    assert main(['compare', base, report('fewer.json', 1.0, 80.0)]) == 1
+    assert 'runs' not in capsys.readouterr().out
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import io
+
+from app.importer import normalize_question
+from app.textbank import read_text_questions, resolve_answer
+
+
+DUMP = '''2023 May
+Q9 - Which option is last?
+A. First
+B. Second
+C. Third
+D. Fourth
+E. Fifth
+
+Q10 - Pick two.
+A) One
+B) Two
+C) Three
+D) Four
+E) Five
+
+ANSWER KEY
+9. E
+10. a,e
+'''
+
+
+def test_parser_keeps_option_e_and_e_keys():
+    questions = list(read_text_questions(io.StringIO(DUMP)))
+
+    assert [q['topic'] for q in questions] == ['2023 May Q9', '2023 May Q10']
+    assert questions[0]['options']['E'] == 'Fifth'
+    assert questions[0]['answer'] == 'E'
+    assert questions[1]['answer'] == 'A,E'
+
+
+def test_resolve_answer_letters_up_to_e():
+    options = {'A': 'One', 'B': 'Two', 'C': 'Three', 'D': 'Four', 'E': 'Five'}
+
+    for entry, answer in (('E', 'E'), ('e', 'E'), ('AE', 'A,E'), ('A,E', 'A,E'), ('Five', 'E')):
+        assert resolve_answer(entry, options) == answer
+
+
+def test_normalize_question_keeps_option_e():
+    q = normalize_question({'text': 'Q', 'options': {'A': '1', 'B': '2', 'E': '5', 'F': '6'}, 'answer': 'e'})
+
+    assert q['options'] == {'A': '1', 'B': '2', 'E': '5'}
+    assert q['answer'] == 'E'
+
+
+def test_normalize_question_rejects_key_outside_options():
+    q = normalize_question({'text': 'Q', 'options': {'A': '1', 'B': '2'}, 'answer': 'E'})
+
+    assert q['answer'] is None